@@ -7,3 +7,6 @@ class AnalyticsConfig(AppConfig):
 
     verbose_name = "Панель Аналитики"
     verbose_name_plural = "Панель Аналитики"
+
+    def ready(self):
+        import apps.analytics.signals
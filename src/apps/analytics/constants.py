@@ -0,0 +1,23 @@
+from django.utils.translation import gettext_lazy as _
+
+RESOLUTION_CHOICES = (
+    ("day", _("День")),
+    ("week", _("Неделя")),
+    ("month", _("Месяц")),
+)
+
+RESOLUTIONS = [resolution for resolution, _label in RESOLUTION_CHOICES]
+
+MAX_SERIES_BUCKETS = 1000
+
+ANALYTICS_PERIODS = {
+    "week": 7,
+    "month": 30,
+    "six_months": 180,
+}
+
+ANALYTICS_METRICS = {
+    "income": "revenue",
+    "clients": "clients",
+    "views": "views",
+}
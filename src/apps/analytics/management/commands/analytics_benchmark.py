@@ -0,0 +1,59 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.analytics.models import VendorObjectDailyStats
+from apps.analytics.services import AnalyticService, VendorRevenueService
+
+
+class Command(BaseCommand):
+    help = "Measure queries and latency of the vendor analytics reads over the current rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Calls per measured read")
+        parser.add_argument("--vendors", type=int, default=10, help="Vendors to sample")
+
+    def handle(self, *args, **options):
+        vendor_ids = list(
+            VendorObjectDailyStats.objects.order_by().values_list("vendor_id", flat=True).distinct()[:options["vendors"]]
+        )
+        if not vendor_ids:
+            self.stdout.write(self.style.WARNING("No rollups found, run analytics_seed first."))
+            return
+
+        today = timezone.now().date()
+        custom_start = today - datetime.timedelta(days=90)
+        reads = (
+            ("report", lambda vendor_id: AnalyticService.get_report(vendor_id, custom_start, today)),
+            (
+                "daily revenue series, 1 year",
+                lambda vendor_id: VendorRevenueService.get_series(
+                    vendor_id, "day", today - datetime.timedelta(days=365), today
+                ),
+            ),
+            (
+                "weekly revenue series, 1 year",
+                lambda vendor_id: VendorRevenueService.get_series(
+                    vendor_id, "week", today - datetime.timedelta(days=365), today
+                ),
+            ),
+        )
+        for label, read in reads:
+            calls, elapsed, queries = 0, 0.0, 0
+            for vendor_id in vendor_ids:
+                for _ in range(options["repeat"]):
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        read(vendor_id)
+                        elapsed += time.perf_counter() - started
+                    queries += len(captured)
+                    calls += 1
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: {elapsed / calls * 1000:.2f} ms/call, {queries / calls:.1f} queries/call"
+                )
+            )
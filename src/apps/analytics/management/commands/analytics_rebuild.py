@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.analytics.services import VendorRevenueService, VendorStatsService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the vendor analytics rollups and revenue buckets from paid offers and object views"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows_count = VendorStatsService.rebuild()
+            buckets_count = VendorRevenueService.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Vendor analytics rebuilt: {rows_count} daily rows, {buckets_count} revenue buckets."
+            )
+        )
@@ -0,0 +1,68 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.analytics import constants
+from apps.analytics.models import VendorObjectDailyStats, VendorRevenueBucket
+from apps.analytics.services import get_bucket_start
+from apps.houserent.models import LocationObject
+
+
+class Command(BaseCommand):
+    help = (
+        "Write synthetic daily rollups and revenue buckets for benchmarking; "
+        "run analytics_rebuild afterwards to restore the real figures"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Days of history per object")
+        parser.add_argument("--vendor", help="Only seed the objects of this vendor id")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        objects = LocationObject.objects.filter(is_deleted=False)
+        if options["vendor"]:
+            objects = objects.filter(vendor_id=options["vendor"])
+        today = timezone.now().date()
+        days = [today - datetime.timedelta(days=offset) for offset in range(options["days"])]
+
+        stats, buckets = [], {}
+        for object_id, vendor_id in objects.values_list("id", "vendor_id"):
+            for day in days:
+                clients = rng.randint(0, 3)
+                revenue = clients * rng.randint(1000, 20000)
+                stats.append(VendorObjectDailyStats(
+                    vendor_id=vendor_id,
+                    object_id=object_id,
+                    day=day,
+                    clients=clients,
+                    revenue=revenue,
+                    views=rng.randint(clients, clients + 40),
+                ))
+                for resolution in constants.RESOLUTIONS:
+                    key = (vendor_id, resolution, get_bucket_start(day, resolution))
+                    buckets[key] = buckets.get(key, 0) + revenue
+
+        VendorObjectDailyStats.objects.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["vendor", "object", "day"],
+            update_fields=["clients", "revenue", "views"],
+        )
+        VendorRevenueBucket.objects.bulk_create(
+            [
+                VendorRevenueBucket(vendor_id=vendor_id, resolution=resolution, bucket_start=bucket_start, revenue=revenue)
+                for (vendor_id, resolution, bucket_start), revenue in buckets.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["vendor", "resolution", "bucket_start"],
+            update_fields=["revenue"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded {len(stats)} daily rows and {len(buckets)} revenue buckets.")
+        )
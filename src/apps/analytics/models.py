@@ -1,3 +1,71 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from apps.analytics import constants
+from apps.common.models import BaseModel
+from apps.houserent.models import LocationObject
+from apps.profiles.models.user import Vendor
+
+
+class VendorObjectDailyStats(BaseModel):
+    vendor = models.ForeignKey(
+        verbose_name=_("Вендор"),
+        to=Vendor,
+        related_name="daily_stats",
+        on_delete=models.CASCADE,
+    )
+    object = models.ForeignKey(
+        verbose_name=_("Объект"),
+        to=LocationObject,
+        related_name="daily_stats",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField(verbose_name=_("День"))
+    clients = models.IntegerField(default=0, verbose_name=_("Клиенты"))
+    revenue = models.BigIntegerField(default=0, verbose_name=_("Доход"))
+    views = models.IntegerField(default=0, verbose_name=_("Просмотры"))
+
+    def __str__(self):
+        return f"{self.object_id} - {self.day}"
+
+    class Meta:
+        db_table = "vendor_object_daily_stats"
+        ordering = ["day"]
+        verbose_name = _("Дневная статистика объекта")
+        verbose_name_plural = _("Дневная статистика объектов")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "object", "day"], name="vendor_object_daily_stats_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["vendor", "day"], name="vendor_daily_stats_day_idx"),
+        ]
+
+
+class VendorRevenueBucket(BaseModel):
+    vendor = models.ForeignKey(
+        verbose_name=_("Вендор"),
+        to=Vendor,
+        related_name="revenue_buckets",
+        on_delete=models.CASCADE,
+    )
+    resolution = models.CharField(
+        max_length=10, choices=constants.RESOLUTION_CHOICES, verbose_name=_("Интервал")
+    )
+    bucket_start = models.DateField(verbose_name=_("Начало интервала"))
+    revenue = models.BigIntegerField(default=0, verbose_name=_("Доход"))
+
+    def __str__(self):
+        return f"{self.vendor_id} - {self.resolution} - {self.bucket_start}"
+
+    class Meta:
+        db_table = "vendor_revenue_buckets"
+        ordering = ["bucket_start"]
+        verbose_name = _("Доход вендора за интервал")
+        verbose_name_plural = _("Доходы вендоров по интервалам")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "resolution", "bucket_start"], name="vendor_revenue_buckets_uniq"
+            ),
+        ]
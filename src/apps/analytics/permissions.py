@@ -2,6 +2,9 @@ from rest_framework import permissions
 
 
 class IsVendor(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and hasattr(request.user, "vendor")
+
     def has_object_permission(self, request, view, obj):
         if request.user.is_authenticated:
             if request.method in permissions.SAFE_METHODS:
@@ -1,15 +1,15 @@
 from rest_framework import serializers
 
 
-class AnalyticSerializer(serializers.Serializer):
-    actual_views = serializers.IntegerField()
-    total_income_date = serializers.IntegerField()
-    total_income = serializers.IntegerField()
-    income_month = serializers.IntegerField()
+class AnalyticPeriodSerializer(serializers.Serializer):
     income = serializers.IntegerField()
-    client_month = serializers.IntegerField()
-    client = serializers.IntegerField()
-    analytics_date_total = serializers.IntegerField()
-    analytics_date = serializers.IntegerField()
-    read_only_fields = ('vendor',)
+    clients = serializers.IntegerField()
+    views = serializers.IntegerField()
+
 
+class AnalyticSerializer(serializers.Serializer):
+    week = AnalyticPeriodSerializer()
+    month = AnalyticPeriodSerializer()
+    six_months = AnalyticPeriodSerializer()
+    custom = AnalyticPeriodSerializer(allow_null=True)
+    total = AnalyticPeriodSerializer()
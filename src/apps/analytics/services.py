@@ -1,59 +1,329 @@
 from apps.common.services import Service
-from django.db.models import Count, Sum, Q
-from datetime import timedelta
-from apps.profiles.models.user import Vendor
+from apps.common.exceptions import UnifiedErrorResponse
+from apps.analytics import constants
+from apps.analytics.models import VendorObjectDailyStats, VendorRevenueBucket
+from apps.houserent.models import LocationObject, LocationObjectView
+from apps.houserent.ranking import mark_dirty
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Q
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils.dateparse import parse_date
+from datetime import date, timedelta
 from apps.travels.models import Orders, TravelOffer
 from django.utils import timezone
+from rest_framework import status
+
+
+def increment(model, lookup, deltas):
+    """Add ``deltas`` to the row matching ``lookup``, creating it if missing."""
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**changes)
+
+
+def get_bucket_start(day, resolution):
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    return day
+
+
+def get_next_bucket(bucket_start, resolution):
+    if resolution == "week":
+        return bucket_start + timedelta(days=7)
+    if resolution == "month":
+        year, month = divmod(bucket_start.month, 12)
+        return date(bucket_start.year + year, month + 1, 1)
+    return bucket_start + timedelta(days=1)
+
+
+def get_series_start(end, resolution):
+    """Start of the earliest bucket of a ``MAX_SERIES_BUCKETS`` long series ending at ``end``."""
+    bucket_start = get_bucket_start(end, resolution)
+    count = constants.MAX_SERIES_BUCKETS - 1
+    if resolution == "week":
+        return bucket_start - timedelta(weeks=count)
+    if resolution == "month":
+        year, month = divmod(bucket_start.month - 1 - count, 12)
+        return date(bucket_start.year + year, month + 1, 1)
+    return bucket_start - timedelta(days=count)
+
+
+class VendorStatsService(Service):
+    """Daily per-object rollups of paid clients, revenue and views.
+
+    Rows are keyed by (vendor, object, day) and changed by deltas as offers are
+    paid and views are recorded, so dashboards sum a handful of rows instead
+    of scanning the vendor's order history.
+    """
+    model = VendorObjectDailyStats
+    offer_model = TravelOffer
+    order_model = Orders
+    object_model = LocationObject
+    view_model = LocationObjectView
+
+    @classmethod
+    def record(cls, vendor_id, object_id, day, **deltas):
+        increment(cls.model, {"vendor_id": vendor_id, "object_id": object_id, "day": day}, deltas)
+        mark_dirty([object_id])
+
+    @classmethod
+    def record_offer(cls, offer, sign):
+        order = (
+            cls.order_model.objects.filter(id=offer.order_id)
+            .values_list(
+                "created_at", "match_object_id", "match_object__vendor_id", "travel_detail__date__end_date"
+            )
+            .first()
+        )
+        if order is None:
+            return
+        created_at, object_id, vendor_id, end_date = order
+        cls.record(vendor_id, object_id, created_at.date(), clients=sign, revenue=sign * offer.price)
+        VendorRevenueService.record(vendor_id, end_date, sign * offer.price)
+
+    @classmethod
+    def offer_saved(cls, offer):
+        # The flag flips with a conditional update, so concurrent saves of the
+        # same offer count its payment exactly once.
+        if offer.is_payed and not offer.is_deleted:
+            if cls.offer_model.objects.filter(id=offer.id, is_counted=False).update(is_counted=True):
+                offer.is_counted = True
+                cls.record_offer(offer, 1)
+        elif offer.is_counted:
+            if cls.offer_model.objects.filter(id=offer.id, is_counted=True).update(is_counted=False):
+                offer.is_counted = False
+                cls.record_offer(offer, -1)
+
+    @classmethod
+    def offer_deleted(cls, offer):
+        if offer.is_counted:
+            cls.record_offer(offer, -1)
+
+    @classmethod
+    def record_view(cls, view, sign):
+        vendor_id = (
+            cls.object_model.objects.filter(id=view.object_id)
+            .values_list("vendor_id", flat=True)
+            .first()
+        )
+        if vendor_id is None:
+            return
+        cls.record(vendor_id, view.object_id, view.created_at.date(), views=sign)
+
+    @staticmethod
+    def get_period(request):
+        period = {}
+        for name in ("start", "end"):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            period[name] = parse_date(value)
+            if period[name] is None:
+                raise UnifiedErrorResponse(
+                    code=status.HTTP_400_BAD_REQUEST, detail=f"{name} must be a date in YYYY-MM-DD format"
+                )
+        return period
+
+    @classmethod
+    def get_totals(cls, vendor_id, month_start, start=None, end=None):
+        period = Q()
+        if start:
+            period &= Q(day__gte=start)
+        if end:
+            period &= Q(day__lte=end)
+        month = Q(day__gte=month_start)
+        return cls.filter(vendor_id=vendor_id, object__is_deleted=False).aggregate(
+            total_clients_all_time=Coalesce(Sum("clients"), 0),
+            total_clients_current_month=Coalesce(Sum("clients", filter=month), 0),
+            total_revenue_all_time=Coalesce(Sum("revenue"), 0),
+            total_revenue_current_month=Coalesce(Sum("revenue", filter=month), 0),
+            total_views=Coalesce(Sum("views"), 0),
+            period_clients=Coalesce(Sum("clients", filter=period), 0),
+            period_revenue=Coalesce(Sum("revenue", filter=period), 0),
+            period_views=Coalesce(Sum("views", filter=period), 0),
+        )
+
+    @classmethod
+    def rebuild(cls):
+        rows = {}
+
+        def get_row(vendor_id, object_id, day):
+            key = (vendor_id, object_id, day)
+            if key not in rows:
+                rows[key] = cls.model(vendor_id=vendor_id, object_id=object_id, day=day)
+            return rows[key]
+
+        offers = (
+            cls.offer_model.objects.filter(is_payed=True, is_deleted=False)
+            .annotate(day=TruncDate("order__created_at"))
+            .values("day", "order__match_object_id", "order__match_object__vendor_id")
+            .annotate(clients=Count("id"), revenue=Sum("price"))
+            .order_by()
+        )
+        for offer in offers:
+            row = get_row(offer["order__match_object__vendor_id"], offer["order__match_object_id"], offer["day"])
+            row.clients, row.revenue = offer["clients"], offer["revenue"]
+
+        views = (
+            cls.view_model.objects.annotate(day=TruncDate("created_at"))
+            .values("day", "object_id", "object__vendor_id")
+            .annotate(views=Count("id"))
+            .order_by()
+        )
+        for view in views:
+            get_row(view["object__vendor_id"], view["object_id"], view["day"]).views = view["views"]
+
+        with transaction.atomic():
+            cls.model.objects.all().delete()
+            cls.model.objects.bulk_create(rows.values(), batch_size=1000)
+            counted = Q(is_payed=True, is_deleted=False)
+            cls.offer_model.objects.filter(counted, is_counted=False).update(is_counted=True)
+            cls.offer_model.objects.exclude(counted).filter(is_counted=True).update(is_counted=False)
+        return len(rows)
+
+
+class VendorRevenueService(Service):
+    """Per-vendor revenue pre-aggregated into day, week and month buckets.
+
+    A paid offer is booked on its trip end date, in one bucket per resolution,
+    so a series of N buckets is read back as at most N rows.
+    """
+    model = VendorRevenueBucket
+    offer_model = TravelOffer
+
+    @classmethod
+    def record(cls, vendor_id, day, revenue):
+        for resolution in constants.RESOLUTIONS:
+            lookup = {
+                "vendor_id": vendor_id,
+                "resolution": resolution,
+                "bucket_start": get_bucket_start(day, resolution),
+            }
+            increment(cls.model, lookup, {"revenue": revenue})
+
+    @classmethod
+    def get_resolution(cls, request):
+        resolution = request.query_params.get("bucket", "day")
+        if resolution not in constants.RESOLUTIONS:
+            raise UnifiedErrorResponse(
+                code=status.HTTP_400_BAD_REQUEST,
+                detail=f"bucket must be one of: {', '.join(constants.RESOLUTIONS)}",
+            )
+        return resolution
+
+    @classmethod
+    def get_range(cls, vendor_id, start=None, end=None, default_start=None, resolution="day"):
+        """Series range; a start the client did not give is clamped to ``MAX_SERIES_BUCKETS`` buckets."""
+        if start is None or end is None:
+            bounds = cls.filter(vendor_id=vendor_id, resolution="day").aggregate(
+                first=Min("bucket_start"), last=Max("bucket_start")
+            )
+            if bounds["first"] is None:
+                return None
+            today = timezone.now().date()
+            end = end or max(bounds["last"], today)
+            if start is None:
+                start = max(default_start or bounds["first"], get_series_start(end, resolution))
+        return start, end
+
+    @classmethod
+    def get_series(cls, vendor_id, resolution, start, end):
+        """Revenue per bucket from ``start`` to ``end``, empty buckets included."""
+        start, end = get_bucket_start(start, resolution), get_bucket_start(end, resolution)
+        buckets = []
+        bucket = start
+        while bucket <= end:
+            buckets.append(bucket)
+            if len(buckets) > constants.MAX_SERIES_BUCKETS:
+                raise UnifiedErrorResponse(
+                    code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"The range spans more than {constants.MAX_SERIES_BUCKETS} buckets",
+                )
+            bucket = get_next_bucket(bucket, resolution)
+
+        revenue = dict(
+            cls.filter(vendor_id=vendor_id, resolution=resolution, bucket_start__range=(start, end))
+            .values_list("bucket_start", "revenue")
+        )
+        return [{"date": bucket, "total_price": revenue.get(bucket, 0)} for bucket in buckets]
+
+    @classmethod
+    def rebuild(cls):
+        rows = {}
+        offers = (
+            cls.offer_model.objects.filter(is_payed=True, is_deleted=False)
+            .values("order__match_object__vendor_id", "order__travel_detail__date__end_date")
+            .annotate(revenue=Sum("price"))
+            .order_by()
+        )
+        for offer in offers:
+            vendor_id = offer["order__match_object__vendor_id"]
+            for resolution in constants.RESOLUTIONS:
+                bucket_start = get_bucket_start(offer["order__travel_detail__date__end_date"], resolution)
+                key = (vendor_id, resolution, bucket_start)
+                if key not in rows:
+                    rows[key] = cls.model(vendor_id=vendor_id, resolution=resolution, bucket_start=bucket_start)
+                rows[key].revenue += offer["revenue"]
+
+        with transaction.atomic():
+            cls.model.objects.all().delete()
+            cls.model.objects.bulk_create(rows.values(), batch_size=1000)
+        return len(rows)
 
 
 class AnalyticService(Service):
-    model = Vendor
-
-    @classmethod
-    def get_total_income(cls, period, vendor_id):
-        today = timezone.now()
-        if period == 'week':
-            start_date = today - timedelta(days=7)
-        elif period == 'month':
-            start_date = today - timedelta(days=30)
-        elif period == 'six_months':
-            start_date = today - timedelta(days=180)
-        else:
-            return None
-
-        total_stats = cls.model.objects.filter(id=vendor_id).annotate(
-            total_income_date=Sum('vendor__user_currencies__transactions__amount', filter=Q(
-                analytics_date_total__gte=start_date, vendor__user_currencies__transactions__pg_result="успешно")),
-            total_income=Sum('vendor__user_currencies__transactions__amount', filter=Q(
-                vendor__user_currencies__transactions__pg_result="успешно"
-            )),
-        ).first()
-        return total_stats
-
-    @classmethod
-    def get_income_client(cls, period, vendor_id):
-        today = timezone.now()
-        if period == 'month':
-            start_date = today - timedelta(days=30)
-        else:
-            return None
-
-        income_client_stats = cls.model.objects.filter(id=vendor_id).annotate(
-            income_month=Sum('vendor__user_currencies__transactions__amount', filter=Q(
-                analytics_date=start_date, vendor__user_currencies__transactions__pg_result="успешно")),
-            income=Sum('vendor__user_currencies__transactions__amount', filter=Q(
-                vendor__user_currencies__transactions__pg_result="успешно")),
-            client_month=Count('vendors__orders__offers', filter=Q(analytics_date=start_date,
-                                                                   vendors__orders__approved=True,
-                                                                   vendors__orders__offers__is_accepted=True,
-                                                                   vendors__orders__offers__is_payed=True)),
-            client=Count('vendors__orders__offers', filter=Q(vendors__orders__approved=True,
-                                                             vendors__orders__offers__is_accepted=True,
-                                                             vendors__orders__offers__is_payed=True)),
-            actual_views=Sum('vendors__object_locations__views'),
-
-        ).first()
-        return income_client_stats
+    """Vendor report for the fixed periods and an optional custom range.
+
+    Every period is a filtered ``Sum`` over the daily rollups, so the whole
+    report is a single aggregate query over one row per object and day.
+    """
+    model = VendorObjectDailyStats
+
+    @classmethod
+    def get_periods(cls, start=None, end=None):
+        today = timezone.now().date()
+        periods = {
+            name: Q(day__gt=today - timedelta(days=days))
+            for name, days in constants.ANALYTICS_PERIODS.items()
+        }
+        if start or end:
+            custom = Q()
+            if start:
+                custom &= Q(day__gte=start)
+            if end:
+                custom &= Q(day__lte=end)
+            periods["custom"] = custom
+        periods["total"] = Q()
+        return periods
+
+    @classmethod
+    def get_report(cls, vendor_id, start=None, end=None):
+        periods = cls.get_periods(start, end)
+        aggregates = {
+            f"{name}__{metric}": Coalesce(Sum(field, filter=period), 0)
+            for name, period in periods.items()
+            for metric, field in constants.ANALYTICS_METRICS.items()
+        }
+        totals = cls.filter(vendor_id=vendor_id, object__is_deleted=False).aggregate(**aggregates)
+        report = {name: {} for name in periods}
+        for key, value in totals.items():
+            name, metric = key.split("__")
+            report[name][metric] = value
+        report.setdefault("custom", None)
+        return report
+
+    @classmethod
+    def get_vendor_report(cls, request, vendor_id):
+        if str(vendor_id) != str(request.user.id):
+            raise UnifiedErrorResponse(code=status.HTTP_404_NOT_FOUND, detail="Object not found")
+        return cls.get_report(vendor_id, **VendorStatsService.get_period(request))
 
 
 class AnalyticsRejectedClientServices(Service):
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.analytics.services import VendorStatsService
+from apps.houserent.models import LocationObjectView
+from apps.travels.models import TravelOffer
+
+
+@receiver(post_save, sender=TravelOffer)
+def count_offer_payment(sender, instance, **kwargs):
+    VendorStatsService.offer_saved(instance)
+
+
+@receiver(post_delete, sender=TravelOffer)
+def uncount_offer_payment(sender, instance, **kwargs):
+    VendorStatsService.offer_deleted(instance)
+
+
+@receiver(post_save, sender=LocationObjectView)
+def count_object_view(sender, instance, created, **kwargs):
+    if created:
+        VendorStatsService.record_view(instance, 1)
+
+
+@receiver(post_delete, sender=LocationObjectView)
+def uncount_object_view(sender, instance, **kwargs):
+    VendorStatsService.record_view(instance, -1)
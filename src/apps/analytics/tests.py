@@ -1,3 +1,249 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics import constants
+from apps.analytics.models import VendorObjectDailyStats, VendorRevenueBucket
+from apps.analytics.services import AnalyticService, VendorRevenueService, VendorStatsService, get_series_start
+from apps.common.exceptions import UnifiedErrorResponse
+from apps.common.testing import LOCMEM_CACHES, create_object, create_offer, create_order, create_user, create_vendor
+from apps.houserent.models import LocationObjectView
+from apps.profiles.models.user import CustomUser
+from apps.travels.models import TravelOffer
+
+
+def get_daily_stats():
+    return {
+        (row.vendor_id, row.object_id, row.day): (row.clients, row.revenue, row.views)
+        for row in VendorObjectDailyStats.objects.all()
+        if row.clients or row.revenue or row.views
+    }
+
+
+def get_revenue_buckets():
+    return {
+        (row.vendor_id, row.resolution, row.bucket_start): row.revenue
+        for row in VendorRevenueBucket.objects.all()
+        if row.revenue
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IncrementalRollupTests(TestCase):
+    """The rollups kept up by signals match what a rebuild computes from scratch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_vendor()
+        cls.objects = [create_object(cls.vendor), create_object(cls.vendor)]
+        cls.user = create_user()
+
+    def assert_matches_rebuild(self):
+        daily_stats, revenue_buckets = get_daily_stats(), get_revenue_buckets()
+        VendorStatsService.rebuild()
+        VendorRevenueService.rebuild()
+        self.assertEqual(daily_stats, get_daily_stats())
+        self.assertEqual(revenue_buckets, get_revenue_buckets())
+
+    def pay(self, offer):
+        offer.is_payed = True
+        offer.save()
+        return offer
+
+    def test_paid_offers(self):
+        for location_object in self.objects:
+            self.pay(create_offer(create_order(location_object), price=1500))
+        create_offer(create_order(self.objects[0]), price=700)
+
+        totals = VendorStatsService.get_totals(self.vendor.id, month_start=self.objects[0].created_at.date())
+        self.assertEqual(totals['total_clients_all_time'], 2)
+        self.assertEqual(totals['total_revenue_all_time'], 3000)
+        self.assert_matches_rebuild()
+
+    def test_saving_a_paid_offer_again_counts_it_once(self):
+        offer = self.pay(create_offer(create_order(self.objects[0]), price=1000))
+        offer.comment = 'updated'
+        offer.save()
+        TravelOffer.objects.get(id=offer.id).save()
+
+        self.assertEqual(sum(clients for clients, _, _ in get_daily_stats().values()), 1)
+        self.assert_matches_rebuild()
+
+    def test_unpaid_soft_deleted_and_deleted_offers(self):
+        unpaid = self.pay(create_offer(create_order(self.objects[0]), price=1000))
+        unpaid.is_payed = False
+        unpaid.save()
+
+        soft_deleted = self.pay(create_offer(create_order(self.objects[0]), price=2000))
+        soft_deleted.is_deleted = True
+        soft_deleted.save()
+
+        self.pay(create_offer(create_order(self.objects[1]), price=3000)).delete()
+
+        kept = self.pay(create_offer(create_order(self.objects[1]), price=4000))
+
+        self.assertEqual(
+            {key[1]: value for key, value in get_daily_stats().items()},
+            {self.objects[1].id: (1, kept.price, 0)},
+        )
+        self.assert_matches_rebuild()
+
+    def test_views(self):
+        views = [LocationObjectView.objects.create(user=self.user, object=self.objects[0]) for _ in range(3)]
+        LocationObjectView.objects.create(user=self.user, object=self.objects[1])
+        views[0].delete()
+
+        self.assertEqual(
+            {key[1]: value[2] for key, value in get_daily_stats().items()},
+            {self.objects[0].id: 2, self.objects[1].id: 1},
+        )
+        self.assert_matches_rebuild()
+
+    def test_rebuild_resets_counted_flags(self):
+        offer = self.pay(create_offer(create_order(self.objects[0]), price=1000))
+        TravelOffer.objects.filter(id=offer.id).update(is_payed=False)
+        VendorStatsService.rebuild()
+        self.assertFalse(TravelOffer.objects.get(id=offer.id).is_counted)
+        self.assertEqual(get_daily_stats(), {})
+
+
+class SeriesStartTests(SimpleTestCase):
+    def test_day(self):
+        self.assertEqual(
+            get_series_start(date(2024, 3, 15), "day"),
+            date(2024, 3, 15) - timedelta(days=constants.MAX_SERIES_BUCKETS - 1),
+        )
+
+    def test_week(self):
+        start = get_series_start(date(2024, 3, 15), "week")
+        self.assertEqual(start.weekday(), 0)
+        self.assertEqual((date(2024, 3, 11) - start).days, 7 * (constants.MAX_SERIES_BUCKETS - 1))
+
+    def test_month(self):
+        start = get_series_start(date(2024, 3, 15), "month")
+        months = (2024 - start.year) * 12 + 3 - start.month
+        self.assertEqual(start.day, 1)
+        self.assertEqual(months, constants.MAX_SERIES_BUCKETS - 1)
+
+
+class RevenueSeriesRangeTests(TestCase):
+    """A long history is clamped unless the client asked for the range."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_vendor()
+        cls.today = timezone.now().date()
+        cls.first_day = cls.today - timedelta(days=constants.MAX_SERIES_BUCKETS + 500)
+        for day in (cls.first_day, cls.today):
+            VendorRevenueService.record(cls.vendor.id, day, 100)
+
+    def test_default_range_is_clamped(self):
+        start, end = VendorRevenueService.get_range(self.vendor.id, resolution="day")
+        series = VendorRevenueService.get_series(self.vendor.id, "day", start, end)
+        self.assertEqual(len(series), constants.MAX_SERIES_BUCKETS)
+        self.assertEqual(series[-1], {"date": self.today, "total_price": 100})
+
+    def test_coarser_bucket_keeps_the_whole_history(self):
+        start, end = VendorRevenueService.get_range(self.vendor.id, resolution="month")
+        series = VendorRevenueService.get_series(self.vendor.id, "month", start, end)
+        self.assertEqual(sum(bucket["total_price"] for bucket in series), 200)
+
+    def test_explicit_end_clamps_the_default_start(self):
+        end = self.today - timedelta(days=10)
+        start, _ = VendorRevenueService.get_range(self.vendor.id, end=end, resolution="day")
+        self.assertEqual(start, get_series_start(end, "day"))
+
+    def test_explicit_range_over_the_limit_is_refused(self):
+        start, end = VendorRevenueService.get_range(
+            self.vendor.id, start=self.first_day, end=self.today, resolution="day"
+        )
+        with self.assertRaises(UnifiedErrorResponse):
+            VendorRevenueService.get_series(self.vendor.id, "day", start, end)
+
+    def test_explicit_start_is_kept(self):
+        start, _ = VendorRevenueService.get_range(self.vendor.id, start=self.first_day, resolution="day")
+        self.assertEqual(start, self.first_day)
+
+    def test_vendor_without_revenue(self):
+        self.assertIsNone(VendorRevenueService.get_range(create_vendor().id))
+
+
+class AnalyticReportTests(TestCase):
+    """The report is one aggregate over the daily rollups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_vendor()
+        cls.objects = [create_object(cls.vendor, images=0), create_object(cls.vendor, images=0)]
+        cls.today = timezone.now().date()
+        # (days ago, clients, revenue, views) per object.
+        cls.rows = [(0, 1, 100, 10), (5, 2, 200, 20), (20, 3, 300, 30), (100, 4, 400, 40), (400, 5, 500, 50)]
+        VendorObjectDailyStats.objects.bulk_create(
+            VendorObjectDailyStats(
+                vendor=cls.vendor,
+                object=location_object,
+                day=cls.today - timedelta(days=days_ago),
+                clients=clients,
+                revenue=revenue,
+                views=views,
+            )
+            for location_object in cls.objects
+            for days_ago, clients, revenue, views in cls.rows
+        )
+
+    def get_expected(self, rows):
+        return {
+            "income": 2 * sum(revenue for _, _, revenue, _ in rows),
+            "clients": 2 * sum(clients for _, clients, _, _ in rows),
+            "views": 2 * sum(views for _, _, _, views in rows),
+        }
+
+    def test_periods(self):
+        report = AnalyticService.get_report(self.vendor.id)
+        self.assertEqual(report["week"], self.get_expected(self.rows[:2]))
+        self.assertEqual(report["month"], self.get_expected(self.rows[:3]))
+        self.assertEqual(report["six_months"], self.get_expected(self.rows[:4]))
+        self.assertEqual(report["total"], self.get_expected(self.rows))
+        self.assertIsNone(report["custom"])
+
+    def test_custom_range(self):
+        report = AnalyticService.get_report(
+            self.vendor.id, start=self.today - timedelta(days=30), end=self.today - timedelta(days=1)
+        )
+        self.assertEqual(report["custom"], self.get_expected(self.rows[1:3]))
+
+    def test_deleted_objects_and_other_vendors_are_left_out(self):
+        self.objects[1].is_deleted = True
+        self.objects[1].save()
+        VendorObjectDailyStats.objects.create(
+            vendor=create_vendor(), object=create_object(create_vendor(), images=0), day=self.today, revenue=999
+        )
+        report = AnalyticService.get_report(self.vendor.id)
+        self.assertEqual(report["total"]["income"], sum(revenue for _, _, revenue, _ in self.rows))
+
+    def test_endpoint_query_count(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.get(pk=self.vendor.pk))
+        url = reverse("analytics:Analytics", kwargs={"pk": self.vendor.pk})
+        # The vendor lookup of the permission check and the report aggregate.
+        with self.assertNumQueries(2):
+            response = client.get(url, {"start": str(self.today - timedelta(days=30))})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"]["income"], self.get_expected(self.rows)["income"])
+
+        location_object = create_object(self.vendor, images=0)
+        VendorObjectDailyStats.objects.bulk_create(
+            VendorObjectDailyStats(vendor=self.vendor, object=location_object, day=self.today - timedelta(days=day))
+            for day in range(200)
+        )
+        with self.assertNumQueries(1):
+            client.get(url)
+
+    def test_endpoint_refuses_other_vendors(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.get(pk=create_vendor().pk))
+        response = client.get(reverse("analytics:Analytics", kwargs={"pk": self.vendor.pk}))
+        self.assertEqual(response.data["error"]["code"], 404)
@@ -2,6 +2,7 @@ from rest_framework import generics
 from apps.analytics.permissions import IsVendor
 from apps.analytics.serializers import *
 from apps.analytics import services
+from apps.common.schemas.analytics import AnalyticsSchema
 from apps.travels.serializers import *
 
 
@@ -9,6 +10,13 @@ class AnalyticsView(generics.RetrieveAPIView):
     serializer_class = AnalyticSerializer
     permission_classes = [IsVendor]
     lookup_field = 'pk'
+    schema = AnalyticsSchema()
+
+    def get_object(self):
+        return services.AnalyticService.get_vendor_report(
+            request=self.request,
+            vendor_id=self.kwargs[self.lookup_field]
+        )
 
 
 class AnalyticRejectedClientList(generics.ListAPIView):
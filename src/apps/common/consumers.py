@@ -0,0 +1,99 @@
+import asyncio
+
+import jwt
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from apps.common import presence
+from apps.common.delivery import get_group_name
+from apps.common.mixins import BatchedFramesMixin
+from core.settings.base import SECRET_KEY
+
+
+class RegisteredConsumer(BatchedFramesMixin, AsyncWebsocketConsumer):
+    """Authenticates a socket and registers its channel under the user's email.
+
+    Everything on the connect path is awaited on the event loop: the user is
+    loaded with the async ORM and the channel is stored with the async Redis
+    client. Only the Celery publish of the connect task, which has no async
+    client, runs in a worker thread. While the socket is open its presence
+    entries are refreshed every ``HEARTBEAT_INTERVAL``.
+    """
+    user_model = None
+    connections_key = None
+    connect_task = None
+
+    user_email = None
+    connections_keys = ()
+    heartbeat_task = None
+
+    def get_query_value(self):
+        query_string = self.scope['query_string'].decode()
+        return query_string.split('=')[1]
+
+    def get_user_id(self):
+        decoded_token = jwt.decode(self.get_query_value(), SECRET_KEY, algorithms=['HS256'])
+        return decoded_token.get("user_id")
+
+    async def get_user(self, user_id):
+        try:
+            return await self.user_model.objects.aget(id=user_id)
+        except self.user_model.DoesNotExist:
+            return None
+
+    async def connect(self):
+        await self.accept()
+        try:
+            user_id = self.get_user_id()
+            if not user_id:
+                await self.close(code=4001)
+                return
+            user = await self.get_user(user_id)
+            if not user:
+                await self.close(code=4001)
+                return
+            await self.register(user)
+        except jwt.ExpiredSignatureError:
+            await self.send(text_data='{"error": "Invalid token"}')
+            await self.close(code=4001)
+        except jwt.DecodeError:
+            await self.send(text_data='{"error": "Invalid token"}')
+            await self.close(code=4001)
+        except Exception as e:
+            await self.send(text_data=f'{{"error": "{str(e)}"}}')
+            await self.close(code=4001)
+
+    async def register(self, user):
+        self.user_email = str(user.email)
+        self.connections_keys = (self.connections_key,)
+        await self.join()
+        if self.connect_task is not None:
+            await self.run_task(self.connect_task)
+
+    async def run_task(self, task):
+        """Enqueue ``task`` for the user without blocking the event loop on the broker."""
+        await sync_to_async(task.delay, thread_sensitive=False)(self.user_email)
+
+    async def join(self):
+        await presence.aregister(self.connections_keys, self.user_email, self.channel_name)
+        await asyncio.gather(*(
+            self.channel_layer.group_add(group, self.channel_name) for group in self.get_groups()
+        ))
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+
+    def get_groups(self):
+        return [get_group_name(key, self.user_email) for key in self.connections_keys]
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(presence.HEARTBEAT_INTERVAL)
+            await presence.aregister(self.connections_keys, self.user_email, self.channel_name)
+
+    async def disconnect(self, event):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+        if self.user_email and self.connections_keys:
+            await presence.aunregister(self.connections_keys, self.user_email, self.channel_name)
+            await asyncio.gather(*(
+                self.channel_layer.group_discard(group, self.channel_name) for group in self.get_groups()
+            ))
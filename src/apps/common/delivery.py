@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from apps.common import outbox
+from apps.common.presence import get_channels
+
+
+def get_group_name(connections_key, email):
+    """Channel-layer group joined by every socket of ``email`` on the given stream."""
+    digest = hashlib.sha1(email.lower().encode('utf-8')).hexdigest()
+    return f'{connections_key}.{digest}'
+
+
+class ChannelBatch:
+    """Collects WebSocket pushes for any number of recipients and sends them on ``flush``.
+
+    Messages for the same channel or group and type are merged into one event.
+    Outbox writes of published messages go to Redis in a single pipeline. The
+    channel layer has no multi-target call, so the merged events are sent
+    concurrently from one event loop hop, one ``send``/``group_send`` each.
+    A task should keep one batch for all of its recipients.
+    """
+
+    def __init__(self, channel_layer=None):
+        self.channel_layer = channel_layer or get_channel_layer()
+        self.pending = []
+        self.frames = defaultdict(lambda: defaultdict(list))
+        self.group_frames = defaultdict(lambda: defaultdict(list))
+        self.group_cursors = defaultdict(lambda: defaultdict(list))
+
+    def __len__(self):
+        return sum(
+            len(messages)
+            for targets in (self.frames, self.group_frames)
+            for frames in targets.values()
+            for messages in frames.values()
+        ) + len(self.pending)
+
+    def add(self, channel_name, message_type, message):
+        if isinstance(channel_name, bytes):
+            channel_name = channel_name.decode('utf-8')
+        self.frames[channel_name][message_type].append(message)
+
+    def push(self, connections_key, email, message_type, message):
+        """Queue a message for every live channel of the user, returns whether any was found."""
+        channel_names = get_channels(connections_key, email)
+        for channel_name in channel_names:
+            self.add(channel_name, message_type, message)
+        return bool(channel_names)
+
+    def add_group(self, group, message_type, message, cursor=None):
+        self.group_frames[group][message_type].append(message)
+        if cursor is not None:
+            self.group_cursors[group][message_type].append(cursor)
+
+    def publish(self, connections_key, email, message_type, message):
+        """Queue a message for the user's outbox and group.
+
+        No channel lookup is needed; sockets that are not connected pick the
+        message up from the outbox when they resume.
+        """
+        self.pending.append((connections_key, email, message_type, message))
+
+    def write_outbox(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        cursors = outbox.append_many(pending)
+        for (connections_key, email, message_type, message), cursor in zip(pending, cursors):
+            self.add_group(get_group_name(connections_key, email), message_type, message, cursor)
+
+    @staticmethod
+    def build_events(targets, cursors=None):
+        events = []
+        for target, frames in targets.items():
+            for message_type, messages in frames.items():
+                event = {'type': message_type, 'messages': messages}
+                if cursors and cursors[target][message_type]:
+                    event['cursors'] = cursors[target][message_type]
+                events.append((target, event))
+        return events
+
+    def get_events(self):
+        return self.build_events(self.frames)
+
+    def get_group_events(self):
+        return self.build_events(self.group_frames, self.group_cursors)
+
+    async def send_events(self, events, group_events=()):
+        await asyncio.gather(
+            *(self.channel_layer.send(channel_name, event) for channel_name, event in events),
+            *(self.channel_layer.group_send(group, event) for group, event in group_events),
+        )
+
+    def flush(self):
+        self.write_outbox()
+        events = self.get_events()
+        group_events = self.get_group_events()
+        self.frames.clear()
+        self.group_frames.clear()
+        self.group_cursors.clear()
+        if events or group_events:
+            async_to_sync(self.send_events)(events, group_events)
+        return len(events) + len(group_events)
@@ -1,3 +1,5 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import exceptions
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status
@@ -5,6 +7,9 @@ from rest_framework_simplejwt.exceptions import InvalidToken
 
 
 def unified_exception_handler(exc, context):
+    if isinstance(exc, DjangoValidationError):
+        # Raised by model fields while saving, e.g. an oversized image.
+        exc = exceptions.ValidationError({'detail': exc.messages})
     response = exception_handler(exc, context)
 
     if isinstance(exc, InvalidToken):
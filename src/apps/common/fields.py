@@ -1,9 +1,14 @@
 from io import BytesIO
+import hashlib
 import os
+import posixpath
+from django.core.exceptions import ValidationError
 from django.core.files import File
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.db.models.fields.files import ImageFieldFile
-from PIL import Image, ImageOps
+from django.utils.translation import gettext_lazy as _
+from PIL import Image, ImageOps, UnidentifiedImageError
 from django.conf import settings
 
 
@@ -11,42 +16,177 @@ LARGE_THUMBNAIL_SIZE = settings.LARGE_THUMBNAIL_SIZE
 SMALL_THUMBNAIL_SIZE = settings.SMALL_THUMBNAIL_SIZE
 MEDIUM_THUMBNAIL_SIZE = settings.MEDIUM_THUMBNAIL_SIZE
 
+# Offloaded uploads are stored under this directory until they are compressed.
+PENDING_DIR = 'pending'
+# Resized copies are generated on first request under variants/<variant>/<name>.
+VARIANTS_DIR = 'variants'
+# Compressed outputs are stored once per input digest and shared between rows.
+CAS_DIR = 'cas'
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def open_image(content):
+    """Open an image lazily, refusing more than ``IMAGE_MAX_PIXELS`` pixels before anything is decoded."""
+    try:
+        image = Image.open(content)
+    except Image.DecompressionBombError:
+        raise ValidationError(_("Изображение слишком большое."), code="image_too_large")
+    if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+        # Pillow only owns the file when it was given a path.
+        if isinstance(content, (str, os.PathLike)):
+            image.close()
+        raise ValidationError(_("Изображение слишком большое."), code="image_too_large")
+    return image
+
+
+def validate_image_pixels(value):
+    """Validator for new uploads; only the image header is read."""
+    if not value or getattr(value, '_committed', False) or value.name.split('.')[-1] == 'svg':
+        return
+    position = value.tell()
+    try:
+        open_image(value)
+    except UnidentifiedImageError:
+        # Reported by the image field's own validation.
+        pass
+    finally:
+        value.seek(position)
+
+
+def encode_webp(content, size, quality):
+    # Read uploads spooled to disk straight from their temporary file.
+    if hasattr(content, 'temporary_file_path'):
+        content = content.temporary_file_path()
+    image = open_image(content)
+    # JPEGs are decoded at the smallest 1/2, 1/4 or 1/8 scale still covering
+    # the target, instead of at full resolution.
+    image.draft('RGB', (max(size), max(size)))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+    image.thumbnail(size, reducing_gap=2.0)
+    im_io = BytesIO()
+    image.save(im_io, format="WEBP", optimize=True, quality=quality)
+    return im_io
+
+
+def get_variant_name(variant, name):
+    return posixpath.join(VARIANTS_DIR, variant, name)
+
+
+def get_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def get_copy_cas_name(digest, name):
+    """Name of a file stored with its bytes as they are, e.g. one compressed before the store existed."""
+    return posixpath.join(CAS_DIR, digest[:2], f"{digest}{os.path.splitext(name)[1].lower()}")
+
 
 class CompressedImageFieldFile(ImageFieldFile):
+    @property
+    def is_pending(self):
+        return bool(self.name) and PENDING_DIR in self.name.split('/')[:-1]
+
+    def variant_url(self, variant):
+        """Signed URL of a named size from ``IMAGE_VARIANTS``, built without touching storage."""
+        from apps.common.media import get_media_path, get_variant_path
+
+        if self.is_pending and self.field.placeholder:
+            return self.field.placeholder
+        if self.is_pending or not self.name.endswith('.webp') or self.fits_variant(variant):
+            return get_media_path(self.name)
+        return get_variant_path(variant, self.name)
+
+    def fits_variant(self, variant):
+        """Stored files are never larger than ``thumbnail_size``; resizing them up to it would only re-encode."""
+        width, height = settings.IMAGE_VARIANTS[variant]
+        stored_width, stored_height = self.field.thumbnail_size
+        return width >= stored_width and height >= stored_height
+
+    def variant_urls(self, variants=None):
+        return {
+            variant: self.variant_url(variant)
+            for variant in (variants or settings.IMAGE_VARIANTS)
+        }
+
+    def get_cas_name(self, digest):
+        width, height = self.field.thumbnail_size
+        return posixpath.join(CAS_DIR, digest[:2], f"{digest}-{width}x{height}-q{self.field.quality}.webp")
+
     def save(self, name, content, save=True):
         if name.split('.')[-1] == 'svg':
             super().save(name, content, save)
             return
 
-        image_format = "WEBP"
-        thumbnail_type = (
-            MEDIUM_THUMBNAIL_SIZE
-            if self.field.is_medium_thumbnail
-            else SMALL_THUMBNAIL_SIZE
-            if self.field.is_small_thumbnail
-            else LARGE_THUMBNAIL_SIZE
-            if self.field.is_large_thumbnail
-            else MEDIUM_THUMBNAIL_SIZE
-        )
+        cas_name = self.get_cas_name(get_digest(content))
+        if self.field.offload and not self.storage.exists(cas_name):
+            super().save(posixpath.join(PENDING_DIR, posixpath.basename(name)), content, save)
+            self.schedule_compression()
+            return
+
+        self.use_stored(cas_name, save, create=lambda: self.compress(name, content))
+
+    def use_stored(self, name, save=True, create=None):
+        """Point the field at a stored file and take a reference to it.
+
+        ``create`` builds the file if it is not stored (anymore).
+        """
+        from apps.common.services import StoredImageService
+
+        StoredImageService.acquire(name, self.storage, create)
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+    def schedule_compression(self):
+        from apps.common.tasks import compress_image_field
 
+        model_label = self.instance._meta.label
+        pk = str(self.instance.pk)
+        field_name = self.field.attname
+        pending_name = self.name
+        transaction.on_commit(lambda: compress_image_field.delay(model_label, pk, field_name, pending_name))
+
+    def compress_pending(self):
+        """Replace a pending original with its compressed WebP and return the new name.
+
+        The returned name already holds a reference; the caller releases it
+        if the row no longer points at the pending original.
+        """
+        from apps.common.services import StoredImageService
+
+        pending_name = self.name
+        with self.storage.open(pending_name, 'rb') as content:
+            name = self.get_cas_name(get_digest(content))
+            StoredImageService.acquire(
+                name, self.storage, lambda: self.compress(posixpath.basename(pending_name), content)
+            )
+        self.storage.delete(pending_name)
+        return name
+
+    def compress(self, name, content):
         # Compressed Image
-        image = Image.open(content)
-        image = image.convert('RGBA')
-        image = ImageOps.exif_transpose(image)
-        image.thumbnail(thumbnail_type)
-        im_io = BytesIO()
-        image.save(im_io, format=image_format, optimize=True, quality=self.field.quality)
+        im_io = encode_webp(content, self.field.thumbnail_size, self.field.quality)
 
         # Change extension
         filename = os.path.splitext(name)[0]
         filename = f"{filename}.webp"
 
-        image = File(im_io, name=filename)
-        super().save(filename, image, save)
+        return File(im_io, name=filename)
 
 
 class CompressedImageField(models.ImageField):
     attr_class = CompressedImageFieldFile
+    default_validators = [*models.ImageField.default_validators, validate_image_pixels]
 
     def __init__(
             self, verbose_name=None, name=None,
@@ -55,16 +195,69 @@ class CompressedImageField(models.ImageField):
             is_small_thumbnail=False,
             is_medium_thumbnail=False,
             is_large_thumbnail=False,
+            offload=False,
+            placeholder=None,
             **kwargs
     ):
         self.quality = quality
+        self.offload = offload
+        self.placeholder = placeholder if placeholder is not None else settings.IMAGE_PLACEHOLDER_URL
         self.is_small_thumbnail = is_small_thumbnail
         self.is_medium_thumbnail = is_medium_thumbnail
         self.is_large_thumbnail = is_large_thumbnail
         super().__init__(verbose_name, name, width_field, height_field, **kwargs)
 
+    @property
+    def thumbnail_size(self):
+        return (
+            MEDIUM_THUMBNAIL_SIZE
+            if self.is_medium_thumbnail
+            else SMALL_THUMBNAIL_SIZE
+            if self.is_small_thumbnail
+            else LARGE_THUMBNAIL_SIZE
+            if self.is_large_thumbnail
+            else MEDIUM_THUMBNAIL_SIZE
+        )
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            post_init.connect(self.remember_name, sender=cls, weak=False)
+            post_save.connect(self.release_replaced_file, sender=cls, weak=False)
+            post_delete.connect(self.release_file, sender=cls, weak=False)
+
+    def get_name(self, instance):
+        value = instance.__dict__.get(self.attname)
+        return getattr(value, 'name', value) or ''
+
+    def remember_name(self, sender, instance, **kwargs):
+        """Keep the name the row holds, so a replaced file can be released after the save."""
+        # Deferred fields are not loaded; their old name stays unknown.
+        if self.attname in instance.__dict__:
+            instance.__dict__.setdefault('_stored_image_names', {})[self.attname] = self.get_name(instance)
+
+    def release_replaced_file(self, sender, instance, update_fields=None, **kwargs):
+        from apps.common.services import StoredImageService
+
+        if update_fields is not None and self.name not in update_fields:
+            return
+        names = instance.__dict__.setdefault('_stored_image_names', {})
+        old_name, names[self.attname] = names.get(self.attname), self.get_name(instance)
+        if old_name and old_name != names[self.attname] and old_name.startswith(f"{CAS_DIR}/"):
+            storage = self.storage
+            transaction.on_commit(lambda: StoredImageService.release(old_name, storage))
+
+    def release_file(self, sender, instance, **kwargs):
+        from apps.common.services import StoredImageService
+
+        field_file = getattr(instance, self.attname)
+        if field_file and field_file.name.startswith(f"{CAS_DIR}/"):
+            StoredImageService.release(field_file.name, field_file.storage)
+
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         if self.quality:
             kwargs['quality'] = self.quality
+        if self.offload:
+            kwargs['offload'] = True
         return name, path, args, kwargs
@@ -0,0 +1,89 @@
+import multiprocessing
+import resource
+import time
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageOps
+
+from apps.common.fields import encode_webp
+
+EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def legacy_encode_webp(content, size, quality):
+    """The decode path used before draft decoding: full resolution, always RGBA."""
+    image = Image.open(content)
+    image = image.convert('RGBA')
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(size)
+    im_io = BytesIO()
+    image.save(im_io, format="WEBP", optimize=True, quality=quality)
+    return im_io
+
+
+def current_rss_kb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def measure(encode, path, size, quality, connection):
+    start_rss = current_rss_kb()
+    started = time.perf_counter()
+    with open(path, 'rb') as content:
+        encode(content, size, quality)
+    elapsed = time.perf_counter() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send((elapsed, max(peak_rss - start_rss, 0)))
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = "Compare time and peak RSS of the legacy and draft-mode image decode paths over a photo corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory with the photos to encode")
+        parser.add_argument(
+            "--size", type=int, default=settings.SMALL_THUMBNAIL_SIZE[0], help="Target thumbnail side in pixels"
+        )
+        parser.add_argument("--quality", type=int, default=60, help="WebP quality")
+
+    def run(self, encode, path, size, quality):
+        # Every measurement runs in its own forked process so peak RSS is per image.
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=measure, args=(encode, path, size, quality, sender))
+        process.start()
+        result = receiver.recv()
+        process.join()
+        return result
+
+    def handle(self, *args, **options):
+        size = (options["size"], options["size"])
+        paths = sorted(
+            path for path in Path(options["corpus"]).rglob("*") if path.suffix.lower() in EXTENSIONS
+        )
+        totals = {"before": [0.0, 0], "after": [0.0, 0]}
+
+        for path in paths:
+            before = self.run(legacy_encode_webp, path, size, options["quality"])
+            after = self.run(encode_webp, path, size, options["quality"])
+            for key, (elapsed, peak_kb) in (("before", before), ("after", after)):
+                totals[key][0] += elapsed
+                totals[key][1] = max(totals[key][1], peak_kb)
+            self.stdout.write(
+                f"{path.name}: before {before[0] * 1000:.1f} ms / {before[1] / 1024:.1f} MiB, "
+                f"after {after[0] * 1000:.1f} ms / {after[1] / 1024:.1f} MiB"
+            )
+
+        if not paths:
+            self.stdout.write(self.style.WARNING("No images found."))
+            return
+        for key, (elapsed, peak_kb) in totals.items():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{key}: {elapsed / len(paths) * 1000:.1f} ms/image, max peak RSS {peak_kb / 1024:.1f} MiB"
+                )
+            )
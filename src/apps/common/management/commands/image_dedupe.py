@@ -0,0 +1,84 @@
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.common.fields import CAS_DIR, CompressedImageField, get_copy_cas_name, get_digest
+from apps.common.models import StoredImage
+
+
+class Command(BaseCommand):
+    help = "Move images into the content-addressed store and rebuild reference counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report duplicates without changing anything"
+        )
+
+    def get_fields(self):
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, CompressedImageField):
+                    yield model, field
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        moved = duplicates = 0
+        stored_names = {}
+        old_names = set()
+
+        for model, field in self.get_fields():
+            storage = field.storage
+            rows = model.objects.exclude(**{field.attname: ""}).exclude(**{f"{field.attname}__isnull": True})
+            for pk, name in rows.values_list("pk", field.attname).iterator():
+                field_file = field.attr_class(None, field, name)
+                # Pending uploads are moved by their compression task.
+                if name.startswith(f"{CAS_DIR}/") or name.endswith(".svg") or field_file.is_pending:
+                    continue
+                if not storage.exists(name):
+                    continue
+                key = (storage, name)
+                if key not in stored_names:
+                    with storage.open(name, "rb") as content:
+                        # Legacy files were compressed on upload; they are
+                        # stored by their own bytes instead of a second lossy pass.
+                        cas_name = get_copy_cas_name(get_digest(content), name)
+                        if storage.exists(cas_name):
+                            duplicates += 1
+                        elif not dry_run:
+                            storage.save(cas_name, content)
+                    stored_names[key] = cas_name
+                    old_names.add(key)
+                if not dry_run:
+                    model.objects.filter(pk=pk, **{field.attname: name}).update(**{field.attname: stored_names[key]})
+                moved += 1
+
+        if dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(f"{moved} images would be moved, {duplicates} of them are duplicates.")
+            )
+            return
+
+        for storage, name in old_names:
+            storage.delete(name)
+
+        references = Counter()
+        for model, field in self.get_fields():
+            names = model.objects.filter(**{f"{field.attname}__startswith": f"{CAS_DIR}/"}).values_list(
+                field.attname, flat=True
+            )
+            references.update(names.iterator())
+        with transaction.atomic():
+            StoredImage.objects.all().delete()
+            StoredImage.objects.bulk_create(
+                [StoredImage(name=name, references=count) for name, count in references.items()],
+                batch_size=1000,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{moved} images moved, {duplicates} duplicates merged, "
+                f"{len(references)} stored files referenced."
+            )
+        )
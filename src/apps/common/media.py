@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from apps.common.fields import CAS_DIR, get_variant_name
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def build_url(path):
+    """Absolute URL for a site path; URLs that are already absolute are returned as is."""
+    if path.startswith(("http://", "https://")):
+        return path
+    return f"{settings.BASE_URL}{path}"
+
+
+def is_immutable(name):
+    """Content-addressed files never change under their name."""
+    return name.startswith(f"{CAS_DIR}/")
+
+
+def sign_variant(variant, name):
+    return salted_hmac("image-variant", f"{variant}/{name}").hexdigest()[:16]
+
+
+def check_variant_signature(variant, name, signature):
+    return constant_time_compare(signature or "", sign_variant(variant, name))
+
+
+def get_media_path(name):
+    return f"{settings.MEDIA_URL}{name}"
+
+
+def get_variant_path(variant, name):
+    return f"{get_media_path(get_variant_name(variant, name))}?sig={sign_variant(variant, name)}"
+
+
+def image_url(field_file, variant=None):
+    """Absolute URL of a stored image, computed from its name without touching storage.
+
+    Pending uploads resolve to the field's placeholder when one is set.
+    """
+    if not field_file:
+        return None
+    if field_file.is_pending and field_file.field.placeholder:
+        return build_url(field_file.field.placeholder)
+    if variant is not None:
+        return build_url(field_file.variant_url(variant))
+    return build_url(get_media_path(field_file.name))
@@ -1,3 +1,6 @@
+from apps.common.prefetch import optimize_queryset
+
+
 class SearchByNameMixin:
     @classmethod
     def search_by_name(cls, request):
@@ -6,3 +9,28 @@ class SearchByNameMixin:
         if name is not None:
             queryset = queryset.filter(name__icontains=name)
         return queryset
+
+
+class BatchedFramesMixin:
+    @staticmethod
+    def format_frame(message, stream, cursor=None):
+        if cursor is None:
+            return f'{{"stream": "{stream}", "payload": {message}}}'
+        return f'{{"stream": "{stream}", "cursor": "{cursor}", "payload": {message}}}'
+
+    async def send_frames(self, event, stream=None):
+        messages = event.get("messages")
+        if messages is None:
+            messages = [event["message"]]
+        cursors = event.get("cursors") or [None] * len(messages)
+        for message, cursor in zip(messages, cursors):
+            if stream is not None:
+                message = self.format_frame(message, stream, cursor)
+            await self.send(text_data=message)
+
+
+class PrefetchedQuerysetMixin:
+    """Loads the relations the view's serializer reads, see ``optimize_queryset``."""
+
+    def filter_queryset(self, queryset):
+        return optimize_queryset(super().filter_queryset(queryset), self.get_serializer_class())
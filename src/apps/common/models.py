@@ -19,3 +19,16 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class StoredImage(BaseModel):
+    name = models.CharField(max_length=255, unique=True, verbose_name=_("Путь файла"))
+    references = models.PositiveIntegerField(default=0, verbose_name=_("Количество ссылок"))
+
+    def __str__(self):
+        return f"{self.name} ({self.references})"
+
+    class Meta:
+        db_table = "stored_images"
+        verbose_name = _("Сохраненное изображение")
+        verbose_name_plural = _("Сохраненные изображения")
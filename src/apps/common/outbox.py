@@ -0,0 +1,59 @@
+from decouple import config
+
+from apps.common.redis_pool import get_async_redis, get_redis
+
+OUTBOX_MAXLEN = config('OUTBOX_MAXLEN', default=500, cast=int)
+OUTBOX_TTL = config('OUTBOX_TTL', default=86400, cast=int)
+
+
+def get_key(email):
+    return f'outbox:{email}'
+
+
+def get_ack_key(email, device):
+    """Acks are kept per device, so one device acking does not skip frames for the others."""
+    return f'outbox:ack:{email}:{device}'
+
+
+def append(connections_key, email, message_type, message):
+    """Store a serialized push in the recipient's outbox and return its cursor."""
+    return append_many([(connections_key, email, message_type, message)])[0]
+
+
+def append_many(entries):
+    """Store ``(connections_key, email, type, message)`` entries in one pipeline.
+
+    The outbox is a Redis stream, so cursors are the stream entry ids and are
+    strictly increasing per recipient. Cursors come back in entry order.
+    """
+    with get_redis().pipeline(transaction=False) as pipe:
+        for connections_key, email, message_type, message in entries:
+            pipe.xadd(
+                get_key(email),
+                {'key': connections_key, 'type': message_type, 'message': message},
+                maxlen=OUTBOX_MAXLEN,
+                approximate=True,
+            )
+            pipe.expire(get_key(email), OUTBOX_TTL)
+        results = pipe.execute()
+    return [cursor.decode('utf-8') for cursor in results[::2]]
+
+
+async def aread(email, cursor, connections_keys):
+    """Entries of the given streams written after ``cursor``, oldest first."""
+    entries = await get_async_redis().xrange(get_key(email), min=f'({cursor}', max='+')
+    messages = []
+    for entry_id, fields in entries:
+        connections_key = fields[b'key'].decode('utf-8')
+        if connections_key in connections_keys:
+            messages.append((entry_id.decode('utf-8'), connections_key, fields[b'message'].decode('utf-8')))
+    return messages
+
+
+async def aget_ack(email, device):
+    cursor = await get_async_redis().get(get_ack_key(email, device))
+    return cursor.decode('utf-8') if cursor else None
+
+
+async def aack(email, device, cursor):
+    await get_async_redis().set(get_ack_key(email, device), cursor, ex=OUTBOX_TTL)
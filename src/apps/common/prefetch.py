@@ -0,0 +1,60 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def collect_related_paths(serializer, model, prefix='', prefetching=False, select=None, prefetch=None):
+    """Walk a serializer and sort the relations it reads into joins and prefetches.
+
+    Forward foreign keys and one-to-ones are joined with ``select_related``
+    until the walk crosses a to-many relation; from there on every path is
+    prefetched. A plain field whose source ends on a relation (e.g. a
+    ``CharField`` rendering ``str()`` of a foreign key) loads that relation
+    too. Relations that a serializer reads outside its declared
+    fields (e.g. in a ``SerializerMethodField``) can be listed in
+    ``Meta.select_related`` / ``Meta.prefetch_related``.
+    """
+    select = set() if select is None else select
+    prefetch = set() if prefetch is None else prefetch
+
+    meta = getattr(serializer, 'Meta', None)
+    for path in getattr(meta, 'select_related', ()):
+        path = f'{prefix}__{path}' if prefix else path
+        (prefetch if prefetching else select).add(path)
+    for path in getattr(meta, 'prefetch_related', ()):
+        prefetch.add(f'{prefix}__{path}' if prefix else path)
+
+    for field in serializer.fields.values():
+        if field.source == '*':
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        is_nested = isinstance(nested, serializers.BaseSerializer)
+        parts = field.source.split('.')
+
+        current_model, path, field_prefetching = model, prefix, prefetching
+        for part in parts:
+            try:
+                model_field = current_model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            path = f'{path}__{part}' if path else part
+            if model_field.one_to_many or model_field.many_to_many:
+                field_prefetching = True
+            (prefetch if field_prefetching else select).add(path)
+            current_model = model_field.related_model
+        else:
+            if is_nested and parts:
+                collect_related_paths(nested, current_model, path, field_prefetching, select, prefetch)
+
+    return select, prefetch
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Apply the ``select_related``/``prefetch_related`` the serializer needs."""
+    select, prefetch = collect_related_paths(serializer_class(), queryset.model)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    return queryset
@@ -0,0 +1,52 @@
+import time
+
+from decouple import config
+
+from apps.common.redis_pool import get_async_redis, get_redis
+
+PRESENCE_TTL = config('PRESENCE_TTL', default=90, cast=int)
+HEARTBEAT_INTERVAL = PRESENCE_TTL // 3
+
+
+def get_key(connections_key, email):
+    return f'presence:{connections_key}:{email}'
+
+
+async def aregister(connections_keys, email, channel_name):
+    """Add or refresh a channel in each of the user's presence sets.
+
+    Every set is a sorted set scored by the channel's last heartbeat, so a
+    channel left behind by a crashed node ages out on its own while the other
+    devices of the same user stay live.
+    """
+    now = time.time()
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        for connections_key in connections_keys:
+            key = get_key(connections_key, email)
+            pipe.zadd(key, {channel_name: now})
+            pipe.zremrangebyscore(key, '-inf', now - PRESENCE_TTL)
+            pipe.expire(key, PRESENCE_TTL)
+        await pipe.execute()
+
+
+async def aunregister(connections_keys, email, channel_name):
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        for connections_key in connections_keys:
+            pipe.zrem(get_key(connections_key, email), channel_name)
+        await pipe.execute()
+
+
+def get_channels_many(connections_key, emails):
+    emails = list(emails)
+    if not emails:
+        return {}
+    min_score = time.time() - PRESENCE_TTL
+    with get_redis().pipeline(transaction=False) as pipe:
+        for email in emails:
+            pipe.zrangebyscore(get_key(connections_key, email), min_score, '+inf')
+        results = pipe.execute()
+    return {email: channels for email, channels in zip(emails, results) if channels}
+
+
+def get_channels(connections_key, email):
+    return get_channels_many(connections_key, [email]).get(email, [])
@@ -0,0 +1,101 @@
+import logging
+import threading
+
+import redis
+import redis.asyncio
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_async_pool = None
+
+
+def get_connection_kwargs():
+    return {
+        'host': config('redis_host'),
+        'port': 6379,
+        'db': 0,
+        'username': 'default',
+        'password': 'myPass',
+        'max_connections': config('REDIS_POOL_MAX_CONNECTIONS', default=50, cast=int),
+        'health_check_interval': 30,
+    }
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = redis.ConnectionPool(**get_connection_kwargs())
+    return _pool
+
+
+def get_redis():
+    return redis.Redis(connection_pool=get_pool())
+
+
+def get_async_pool():
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = redis.asyncio.ConnectionPool(**get_connection_kwargs())
+    return _async_pool
+
+
+def get_async_redis():
+    return redis.asyncio.Redis(connection_pool=get_async_pool())
+
+
+def reset_pool():
+    global _pool
+    if _pool is not None:
+        _pool.disconnect()
+    _pool = None
+
+
+def get_pool_stats(pool):
+    if pool is None:
+        return {
+            'max_connections': 0,
+            'created_connections': 0,
+            'in_use_connections': 0,
+            'available_connections': 0,
+            'utilization': 0.0,
+        }
+    in_use = len(pool._in_use_connections)
+    return {
+        'max_connections': pool.max_connections,
+        'created_connections': pool._created_connections,
+        'in_use_connections': in_use,
+        'available_connections': len(pool._available_connections),
+        'utilization': in_use / pool.max_connections,
+    }
+
+
+def get_all_pool_stats():
+    """Stats of this process's sync and asyncio pools."""
+    return {
+        'sync': get_pool_stats(_pool),
+        'async': get_pool_stats(_async_pool),
+    }
+
+
+def log_pool_stats():
+    logger.info('Redis pool stats: %s', get_all_pool_stats())
+
+
+def start_pool_stats_reporter(interval=None):
+    """Log the pool stats every ``interval`` seconds from a daemon thread.
+
+    ``REDIS_POOL_STATS_INTERVAL=0`` turns the reporter off.
+    """
+    interval = config('REDIS_POOL_STATS_INTERVAL', default=60, cast=int) if interval is None else interval
+    if interval <= 0:
+        return None
+
+    def report():
+        while not stop.wait(interval):
+            log_pool_stats()
+
+    stop = threading.Event()
+    threading.Thread(target=report, name='redis-pool-stats', daemon=True).start()
+    return stop
@@ -0,0 +1,28 @@
+from rest_framework.schemas.coreapi import AutoSchema
+import coreschema
+import coreapi
+
+
+class AnalyticsSchema(AutoSchema):
+    def get_manual_fields(self, path, method):
+        api_fields = []
+        if method == "GET":
+            api_fields = [
+                coreapi.Field(
+                    name='start',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="custom period start, YYYY-MM-DD"
+                    )
+                ),
+                coreapi.Field(
+                    name='end',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="custom period end, YYYY-MM-DD"
+                    )
+                )
+            ]
+        return self._manual_fields + api_fields
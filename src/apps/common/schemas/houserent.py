@@ -54,6 +54,31 @@ class ReviewCheckSchema(AutoSchema):
         return self._manual_fields + api_fields
 
 
+class VendorAnalyticsSchema(AutoSchema):
+    def get_manual_fields(self, path, method):
+        api_fields = []
+        if method == "GET":
+            api_fields = [
+                coreapi.Field(
+                    name='start',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="period start, YYYY-MM-DD"
+                    )
+                ),
+                coreapi.Field(
+                    name='end',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="period end, YYYY-MM-DD"
+                    )
+                )
+            ]
+        return self._manual_fields + api_fields
+
+
 class VendorOffersSchema(AutoSchema):
     def get_manual_fields(self, path, method):
         api_fields = []
@@ -66,6 +91,71 @@ class VendorOffersSchema(AutoSchema):
                     schema=coreschema.String(
                         description="choose one: {week, month, half_year, all}"
                     )
+                ),
+                coreapi.Field(
+                    name='start',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="range start, YYYY-MM-DD; overrides date"
+                    )
+                ),
+                coreapi.Field(
+                    name='end',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="range end, YYYY-MM-DD"
+                    )
+                ),
+                coreapi.Field(
+                    name='bucket',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="choose one: {day, week, month}"
+                    )
+                )
+            ]
+        return self._manual_fields + api_fields
+
+
+class RankedObjectSchema(AutoSchema):
+    def get_manual_fields(self, path, method):
+        api_fields = []
+        if method == "GET":
+            api_fields = [
+                coreapi.Field(
+                    name='placement',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="placement id, includes nested placements"
+                    )
+                ),
+                coreapi.Field(
+                    name='object_kind',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="object kind id"
+                    )
+                ),
+                coreapi.Field(
+                    name='object_type',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="object type id"
+                    )
+                ),
+                coreapi.Field(
+                    name='limit',
+                    required=False,
+                    location="query",
+                    schema=coreschema.String(
+                        description="number of objects, at most 100"
+                    )
                 )
             ]
         return self._manual_fields + api_fields
@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from apps.common.media import build_url, image_url
+
 
 class ModelSerializer(serializers.Serializer):
     name = serializers.CharField(max_length=255)
@@ -7,3 +10,37 @@ class ModelSerializer(serializers.Serializer):
     fields = serializers.DictField(
         child=serializers.DictField()
     )
+
+
+class CompressedImageSerializerField(serializers.ImageField):
+    """Image field that serves the placeholder while an offloaded upload is compressed."""
+
+    def to_representation(self, value):
+        return image_url(value)
+
+
+class ImageVariantField(serializers.ReadOnlyField):
+    """Absolute URL of one named size from ``IMAGE_VARIANTS``."""
+
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return image_url(value, self.variant)
+
+
+class ImageSrcsetField(ImageVariantField):
+    """``srcset`` string over the given sizes, e.g. ``".../small/a.webp 512w, ..."``."""
+
+    def __init__(self, variants=('thumb', 'small', 'medium'), **kwargs):
+        self.variants = variants
+        super().__init__(variant=variants[0], **kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return ", ".join(
+            f"{build_url(url)} {settings.IMAGE_VARIANTS[variant][0]}w"
+            for variant, url in value.variant_urls(self.variants).items()
+        )
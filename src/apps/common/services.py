@@ -1,6 +1,9 @@
+from django.db import transaction
+from django.db.models import F
 from rest_framework import status
 
 from apps.common.exceptions import UnifiedErrorResponse
+from apps.common.models import StoredImage
 
 
 class Service:
@@ -31,6 +34,39 @@ class Service:
         abstract = True
 
 
+class StoredImageService(Service):
+    """Reference counts for content-addressed image files."""
+    model = StoredImage
+
+    @classmethod
+    def acquire(cls, name, storage=None, create=None):
+        """Take a reference to a stored file, writing it with ``create()`` when it is missing.
+
+        The row stays locked until the reference is counted, so a concurrent
+        ``release`` cannot delete the file in between.
+        """
+        with transaction.atomic():
+            stored, created = cls.model.objects.select_for_update().get_or_create(
+                name=name, defaults={"references": 1}
+            )
+            if not created:
+                cls.filter(pk=stored.pk).update(references=F("references") + 1)
+            if create is not None and not storage.exists(name):
+                storage.save(name, create())
+
+    @classmethod
+    def release(cls, name, storage):
+        with transaction.atomic():
+            stored = cls.model.objects.select_for_update().filter(name=name).first()
+            if stored is None:
+                return
+            if stored.references > 1:
+                cls.filter(pk=stored.pk).update(references=F("references") - 1)
+                return
+            stored.delete()
+            storage.delete(name)
+
+
 def only_objects_decorator(func: callable):
     def only_objects_wrapper(objects, only=(), *args, **kwargs):
         return func(objects, *args, **kwargs).only(*only)
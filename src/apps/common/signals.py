@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent by ``compress_image_field`` once a row points at its compressed file
+# instead of the pending upload. The row is updated without a save, so
+# receivers of ``post_save`` do not see the change. Provides ``instance`` and
+# ``field_name``.
+image_compressed = Signal()
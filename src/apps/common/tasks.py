@@ -0,0 +1,55 @@
+import logging
+
+from celery import shared_task
+from django.apps import apps
+from django.core.exceptions import ValidationError
+
+from apps.common.services import StoredImageService
+from apps.common.signals import image_compressed
+
+logger = logging.getLogger(__name__)
+
+
+def discard_pending(model, pk, field_name, pending_name, storage):
+    """Drop an upload that could not be compressed and clear the field if it still points at it."""
+    model.objects.filter(pk=pk, **{field_name: pending_name}).update(**{field_name: ''})
+    storage.delete(pending_name)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=2)
+def compress_image_field(self, model_label, pk, field_name, pending_name=None):
+    model = apps.get_model(model_label)
+    storage = model._meta.get_field(field_name).storage
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        # The row is written after the file when it comes from bulk_create.
+        if self.request.retries < self.max_retries:
+            raise self.retry()
+        # The row was never committed, so nothing will pick the upload up.
+        if pending_name:
+            storage.delete(pending_name)
+        return
+
+    field_file = getattr(instance, field_name)
+    if not field_file or not field_file.is_pending:
+        return
+
+    pending_name = field_file.name
+    try:
+        name = field_file.compress_pending()
+    except ValidationError:
+        # Refused images will not compress on a later attempt either.
+        logger.warning('Refused %s %s.%s (%s), discarding it', model_label, pk, field_name, pending_name)
+        discard_pending(model, pk, field_name, pending_name, storage)
+        return
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        logger.exception('Could not compress %s %s.%s (%s), discarding it', model_label, pk, field_name, pending_name)
+        discard_pending(model, pk, field_name, pending_name, storage)
+        return
+    if not model.objects.filter(pk=pk, **{field_name: pending_name}).update(**{field_name: name}):
+        StoredImageService.release(name, field_file.storage)
+        return
+    setattr(instance, field_name, name)
+    image_compressed.send(sender=model, instance=instance, field_name=field_name)
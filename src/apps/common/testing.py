@@ -0,0 +1,103 @@
+import datetime
+import itertools
+
+from django.db.models import Max
+
+from apps.houserent.models import (
+    Location,
+    LocationObject,
+    ObjectImage,
+    ObjectKind,
+    ObjectPrice,
+    ObjectType,
+    Placement,
+)
+from apps.profiles.models.user import Currency, User, Vendor
+from apps.travels.models import (
+    FacilitiesQuantity,
+    GuestQuantity,
+    Orders,
+    TravelBudget,
+    TravelDate,
+    TravelDetail,
+    TravelOffer,
+)
+
+# Cache settings for tests that go through the order payload cache.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+sequence = itertools.count()
+
+
+def create_user(**kwargs):
+    number = next(sequence)
+    kwargs.setdefault('email', f'user{number}@example.com')
+    kwargs.setdefault('first_name', 'Test')
+    kwargs.setdefault('last_name', 'User')
+    if 'currency' not in kwargs:
+        kwargs['currency'], _ = Currency.objects.get_or_create(title='KGS', defaults={'price': 1})
+    return User.objects.create(**kwargs)
+
+
+def create_vendor(**kwargs):
+    number = next(sequence)
+    kwargs.setdefault('email', f'vendor{number}@example.com')
+    kwargs.setdefault('first_name', 'Test')
+    kwargs.setdefault('last_name', 'Vendor')
+    return Vendor.objects.create(**kwargs)
+
+
+def create_object(vendor, placement=None, images=1, **kwargs):
+    number = next(sequence)
+    if placement is None:
+        placement = Placement.objects.create(name=f'Placement {number}')
+    location = Location.objects.create(
+        name=f'Location {number}',
+        placement=placement,
+        address_link='https://example.com/map',
+        rules='-',
+    )
+    kwargs.setdefault('name', f'Object {number}')
+    kwargs.setdefault('description', '-')
+    kwargs.setdefault('room_quantity', 1)
+    kwargs.setdefault('occupancy', 2)
+    kwargs.setdefault('rules', '-')
+    kwargs.setdefault('cancellation_policy', '-')
+    location_object = LocationObject.objects.create(
+        location=location,
+        vendor=vendor,
+        object_type=ObjectType.objects.get_or_create(name='Apartment')[0],
+        object_kind=ObjectKind.objects.get_or_create(name='Room')[0],
+        **kwargs,
+    )
+    for index in range(images):
+        ObjectImage.objects.create(object=location_object, image=f'cas/00/test-{number}-{index}.webp')
+    today = datetime.date.today()
+    ObjectPrice.objects.create(
+        object=location_object,
+        start_date=today,
+        end_date=today + datetime.timedelta(days=30),
+        price=1000,
+    )
+    return location_object
+
+
+def create_order(location_object, user=None, **kwargs):
+    user = user or create_user()
+    today = datetime.date.today()
+    travel_detail = TravelDetail.objects.create(
+        placement=location_object.location.placement,
+        user=user,
+        date=TravelDate.objects.create(start_date=today, end_date=today + datetime.timedelta(days=2)),
+        budget=TravelBudget.objects.create(min_sum='0', max_sum='100000'),
+        guests=GuestQuantity.objects.create(guest_quantity=2),
+        facilities=FacilitiesQuantity.objects.create(facilities_quantity=1),
+        object_kind=location_object.object_kind,
+    )
+    return Orders.objects.create(travel_detail=travel_detail, match_object=location_object, **kwargs)
+
+
+def create_offer(order, **kwargs):
+    last_order_number = TravelOffer.objects.aggregate(Max('order_number'))['order_number__max'] or 0
+    kwargs.setdefault('price', 1000)
+    return TravelOffer.objects.create(order=order, order_number=last_order_number + 1, **kwargs)
@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from apps.common.exception_handlers import unified_exception_handler
+from apps.common.fields import encode_webp, validate_image_pixels
+from apps.common.models import StoredImage
+from apps.common.testing import create_object, create_vendor
+from apps.houserent.models import ObjectImage
+
+
+def make_upload(width, height, name='photo.png'):
+    content = BytesIO()
+    Image.new('RGB', (width, height)).save(content, format='PNG')
+    return SimpleUploadedFile(name, content.getvalue(), content_type='image/png')
+
+
+@override_settings(IMAGE_MAX_PIXELS=100 * 100)
+class ImagePixelLimitTests(SimpleTestCase):
+    def test_accepts_image_at_the_limit(self):
+        upload = make_upload(100, 100)
+        validate_image_pixels(upload)
+        self.assertEqual(upload.tell(), 0)
+
+    def test_refuses_image_over_the_limit(self):
+        with self.assertRaises(ValidationError) as context:
+            validate_image_pixels(make_upload(101, 100))
+        self.assertEqual(context.exception.code, 'image_too_large')
+
+    def test_encode_refuses_image_over_the_limit(self):
+        with self.assertRaises(ValidationError):
+            encode_webp(make_upload(200, 200), (50, 50), 60)
+
+    def test_leaves_pillow_limit_alone(self):
+        self.assertNotEqual(Image.MAX_IMAGE_PIXELS, 100 * 100)
+
+    def test_ignores_files_that_are_not_images(self):
+        validate_image_pixels(SimpleUploadedFile('notes.png', b'not an image'))
+
+
+class ExceptionHandlerTests(SimpleTestCase):
+    def test_model_validation_error_is_a_bad_request(self):
+        response = unified_exception_handler(ValidationError('Изображение слишком большое.'), {})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'detail': 'Изображение слишком большое.'})
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ReplacedImageTests(MediaRootMixin, TestCase):
+    """Pointing a row at another file gives up its reference to the old one."""
+
+    def setUp(self):
+        super().setUp()
+        self.location_object = create_object(create_vendor(), images=0)
+        for name in ('cas/00/old.webp', 'cas/00/new.webp'):
+            default_storage.save(name, ContentFile(b'webp'))
+        StoredImage.objects.create(name='cas/00/old.webp', references=2)
+        self.image = ObjectImage.objects.create(object=self.location_object, image='cas/00/old.webp')
+
+    def get_references(self, name):
+        stored = StoredImage.objects.filter(name=name).first()
+        return stored.references if stored else 0
+
+    def replace(self, image, **kwargs):
+        image.image = 'cas/00/new.webp'
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save(**kwargs)
+
+    def test_replacing_releases_the_old_file(self):
+        self.replace(ObjectImage.objects.get(pk=self.image.pk))
+        self.assertEqual(self.get_references('cas/00/old.webp'), 1)
+
+        self.replace(ObjectImage.objects.create(object=self.location_object, image='cas/00/old.webp'))
+        self.assertEqual(self.get_references('cas/00/old.webp'), 0)
+        self.assertFalse(default_storage.exists('cas/00/old.webp'))
+
+    def test_saving_again_keeps_the_reference(self):
+        image = ObjectImage.objects.get(pk=self.image.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+            image.save()
+        self.assertEqual(self.get_references('cas/00/old.webp'), 2)
+
+    def test_update_fields_without_the_image(self):
+        self.replace(ObjectImage.objects.get(pk=self.image.pk), update_fields=['object'])
+        self.assertEqual(self.get_references('cas/00/old.webp'), 2)
+
+
+class ImageDedupeTests(MediaRootMixin, TestCase):
+    def test_legacy_files_keep_their_bytes(self):
+        location_object = create_object(create_vendor(), images=0)
+        content = BytesIO()
+        Image.new('RGB', (40, 30)).save(content, format='WEBP', quality=60)
+        for name in ('legacy/a.webp', 'legacy/b.webp'):
+            default_storage.save(name, ContentFile(content.getvalue()))
+        images = [
+            ObjectImage.objects.create(object=location_object, image=name)
+            for name in ('legacy/a.webp', 'legacy/b.webp')
+        ]
+
+        call_command('image_dedupe', stdout=StringIO())
+
+        names = {ObjectImage.objects.get(pk=image.pk).image.name for image in images}
+        self.assertEqual(len(names), 1)
+        name, = names
+        with default_storage.open(name, 'rb') as stored:
+            self.assertEqual(stored.read(), content.getvalue())
+        self.assertEqual(StoredImage.objects.get(name=name).references, 2)
+        self.assertFalse(default_storage.exists('legacy/a.webp'))
@@ -1,9 +1,19 @@
 from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.views import View
+from PIL import Image
 from rest_framework.generics import CreateAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from apps.common.serializers import ModelSerializer
 from django.db.models.fields.related import ForeignKey, ManyToManyField
+from apps.common.fields import encode_webp, get_variant_name
+from apps.common.media import IMMUTABLE_CACHE_CONTROL, check_variant_signature, is_immutable
+from apps.common.redis_pool import get_all_pool_stats
 
 
 
@@ -68,3 +78,47 @@ class DynamicModelCreateView(CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save()
+
+
+class ImageVariantView(View):
+    """Generates a named size of a stored image on first request.
+
+    Nginx serves variants that already exist straight from ``MEDIA_ROOT`` and
+    only falls back to this view for the first request of each one. Only
+    signed URLs are generated, so clients cannot make the server resize
+    arbitrary files.
+    """
+
+    def get(self, request, variant, name):
+        size = settings.IMAGE_VARIANTS.get(variant)
+        if size is None or '..' in name.split('/') or not name.endswith('.webp'):
+            raise Http404
+        if not check_variant_signature(variant, name, request.GET.get('sig')):
+            raise Http404
+        variant_name = get_variant_name(variant, name)
+        if not default_storage.exists(variant_name):
+            if not default_storage.exists(name):
+                raise Http404
+            with default_storage.open(name, 'rb') as content:
+                with Image.open(content) as stored:
+                    fits = stored.width <= size[0] and stored.height <= size[1]
+                if fits:
+                    # The stored file is the largest copy there is; serve it
+                    # rather than re-encoding it at a lower quality.
+                    variant_name = name
+                else:
+                    content.seek(0)
+                    image = encode_webp(content, size, settings.IMAGE_VARIANT_QUALITY)
+                    variant_name = default_storage.save(variant_name, File(image))
+        response = FileResponse(default_storage.open(variant_name, 'rb'), content_type='image/webp')
+        if is_immutable(name):
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class RedisPoolStatsView(APIView):
+    """Current Redis pool usage of the process that serves the request."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_all_pool_stats())
@@ -8,3 +8,6 @@ class HouserentConfig(AppConfig):
 
     verbose_name = _("Панель Жилья")
     verbose_name_plural = _("Панель Жилья")
+
+    def ready(self):
+        import apps.houserent.signals
@@ -4,3 +4,21 @@ OBJECT_STATUS_CHOICES = (
     ("created", _("Создан")),
     ("updated", _("Обновлен")),
 )
+
+# Object ranking: every component is scaled to 0..1 and weighted.
+RANKING_WEIGHTS = {
+    "rating": 0.4,
+    "conversion": 0.25,
+    "popularity": 0.2,
+    "price": 0.15,
+}
+RANKING_WINDOW_DAYS = 90
+RANKING_PRICE_HORIZON_DAYS = 30
+# Views in the window that give half of the popularity component.
+RANKING_VIEWS_HALF = 100
+# Conversion starts as if an object had this many orders converting at the prior.
+RANKING_CONVERSION_PRIOR = 0.1
+RANKING_CONVERSION_WEIGHT = 10
+
+RANKED_LIST_LIMIT = 20
+RANKED_LIST_MAX_LIMIT = 100
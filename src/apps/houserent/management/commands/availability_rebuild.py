@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.houserent.services import ObjectAvailabilityService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the object availability index from object prices"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Objects refreshed per transaction"
+        )
+
+    def handle(self, *args, **options):
+        objects_count = ObjectAvailabilityService.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Availability index rebuilt for {objects_count} objects.")
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.houserent.services import ObjectRankingService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescore the objects queued for a ranking refresh, every object with --all, "
+        "or the objects that were never scored with --unscored"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rescore every object")
+        parser.add_argument(
+            "--unscored", action="store_true", help="Score the objects that predate the stored score"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Objects rescored per batch"
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            objects_count = ObjectRankingService.rebuild(chunk_size=options["chunk_size"])
+        elif options["unscored"]:
+            objects_count = ObjectRankingService.rebuild(chunk_size=options["chunk_size"], unscored_only=True)
+        else:
+            objects_count = ObjectRankingService.refresh_dirty(batch_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Scores refreshed for {objects_count} objects."))
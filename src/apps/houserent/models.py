@@ -7,6 +7,7 @@ from apps.common.models import BaseModel
 from apps.profiles.models.user import Vendor, Currency, User
 from apps.common.fields import CompressedImageField
 from apps.houserent import validators, constants
+from apps.reviews import constants as review_constants
 
 from mptt import models as mptt_models
 
@@ -68,6 +69,11 @@ class Placement(mptt_models.MPTTModel):
     class Meta:
         verbose_name = _("Расположение")
         verbose_name_plural = _("Расположения")
+        indexes = [
+            models.Index(
+                fields=["tree_id", "lft", "rght"], name="placement_subtree_idx"
+            ),
+        ]
 
 
 class LocationImage(BaseModel):
@@ -234,7 +240,7 @@ class ObjectKind(BaseModel):
 
 class ObjectImage(BaseModel):
     image = CompressedImageField(
-        verbose_name=_("Фотография Объекта"), null=True, blank=True
+        verbose_name=_("Фотография Объекта"), null=True, blank=True, offload=True
     )
     object = models.ForeignKey(
         verbose_name=_("Объект"),
@@ -354,6 +360,14 @@ class LocationObject(BaseModel):
     partial_refund_cutoff_hours = models.IntegerField(default=24,
                                                       verbose_name=_("Часы до заселения для частичного возврата"))
 
+    reviews_count = models.PositiveIntegerField(default=0, verbose_name=_("Количество отзывов"))
+    quality_sum = models.PositiveIntegerField(default=0, verbose_name=_("Сумма оценок цены"))
+    conveniences_sum = models.PositiveIntegerField(default=0, verbose_name=_("Сумма оценок удобств"))
+    purity_sum = models.PositiveIntegerField(default=0, verbose_name=_("Сумма оценок чистоты"))
+    location_sum = models.PositiveIntegerField(default=0, verbose_name=_("Сумма оценок расположения"))
+    rating = models.FloatField(default=review_constants.RATING_PRIOR_MEAN, verbose_name=_("Рейтинг"))
+    score = models.FloatField(default=0, verbose_name=_("Оценка для выдачи"))
+
     def clean(self):
         super().clean()
         validators.HouseRentValidator.validate_times(
@@ -371,6 +385,13 @@ class LocationObject(BaseModel):
         ordering = ["-created_at"]
         verbose_name = _("Объект")
         verbose_name_plural = _("Объекты")
+        indexes = [
+            models.Index(
+                fields=["-score", "id"],
+                condition=models.Q(is_deleted=False),
+                name="objects_score_idx",
+            ),
+        ]
 
 
 class LocationObjectView(BaseModel):
@@ -387,3 +408,52 @@ class LocationObjectView(BaseModel):
         ordering = ["-created_at"]
         verbose_name = _("Просмотры Объекта")
         verbose_name_plural = _("Просмотры Объекта")
+
+
+class ObjectAvailability(BaseModel):
+    object = models.ForeignKey(
+        verbose_name=_("Объект"),
+        to=LocationObject,
+        related_name="availability_dates",
+        on_delete=models.CASCADE,
+    )
+    placement = models.ForeignKey(
+        verbose_name=_("Расположение"),
+        to=Placement,
+        related_name="availability_dates",
+        on_delete=models.CASCADE,
+    )
+    object_kind = models.ForeignKey(
+        verbose_name=_("Вид объекта"),
+        to=ObjectKind,
+        related_name="availability_dates",
+        on_delete=models.CASCADE,
+    )
+    object_type = models.ForeignKey(
+        verbose_name=_("Тип объекта рамзещения"),
+        to=ObjectType,
+        related_name="availability_dates",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField(verbose_name=_("Дата"))
+    price = models.IntegerField(verbose_name=_("Цена"))
+
+    def __str__(self):
+        return f"{self.object_id} - {self.date} - {self.price}"
+
+    class Meta:
+        db_table = "object_availability"
+        ordering = ["date"]
+        verbose_name = _("Доступность объекта")
+        verbose_name_plural = _("Доступность объектов")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["object", "date"], name="object_availability_object_date_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["placement", "object_kind", "object_type", "date"],
+                name="object_availability_search_idx",
+            ),
+        ]
@@ -0,0 +1,29 @@
+import logging
+
+from django.db import transaction
+from redis import RedisError
+
+from apps.common.redis_pool import get_redis
+
+DIRTY_KEY = 'ranking:dirty'
+
+logger = logging.getLogger(__name__)
+
+
+def mark_dirty(object_ids):
+    """Queue objects for a score refresh once the current transaction commits."""
+    object_ids = [str(object_id) for object_id in object_ids]
+    if object_ids:
+        transaction.on_commit(lambda: push_dirty(object_ids))
+
+
+def push_dirty(object_ids):
+    try:
+        get_redis().sadd(DIRTY_KEY, *object_ids)
+    except RedisError:
+        # The committed change stands; the daily rebuild rescores these objects.
+        logger.exception('Could not queue %s objects for a score refresh', len(object_ids))
+
+
+def pop_dirty(count):
+    return [object_id.decode('utf-8') for object_id in get_redis().spop(DIRTY_KEY, count) or []]
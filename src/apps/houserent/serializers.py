@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from apps.common.fields import validate_image_pixels
+from apps.common.serializers import CompressedImageSerializerField, ImageSrcsetField, ImageVariantField
 from apps.houserent import models, services
 from apps.profiles.models import user as user_models
 from apps.reviews import models as review_models
@@ -111,6 +113,8 @@ class ObjectTypeSerializer(serializers.ModelSerializer):
 
 
 class ObjectImageSerializer(serializers.ModelSerializer):
+    image = CompressedImageSerializerField(required=False, allow_null=True)
+
     class Meta:
         model = models.ObjectImage
         fields = ["id", "image"]
@@ -124,10 +128,19 @@ class ObjectPriceSerializer(serializers.ModelSerializer):
         fields = ["id", "start_date", "end_date", "price"]
 
 
+class ObjectImageListSerializer(serializers.ModelSerializer):
+    image = ImageVariantField(variant="small")
+    srcset = ImageSrcsetField(source="image")
+
+    class Meta:
+        model = models.ObjectImage
+        fields = ["id", "image", "srcset"]
+
+
 class LocationObjectListSerializer(serializers.ModelSerializer):
     object_type = ObjectTypeSerializer(read_only=True)
     object_kind = ObjectKindSerializer(read_only=True)
-    image_objects = ObjectImageSerializer(many=True, read_only=True)
+    image_objects = ObjectImageListSerializer(many=True, read_only=True)
     location = LocationNameSerializer(read_only=True)
     current_price = serializers.IntegerField(read_only=True)
     is_checked = serializers.BooleanField(read_only=True)
@@ -150,6 +163,29 @@ class LocationObjectListSerializer(serializers.ModelSerializer):
         ]
 
 
+class RankedObjectSerializer(serializers.ModelSerializer):
+    object_type = ObjectTypeSerializer(read_only=True)
+    object_kind = ObjectKindSerializer(read_only=True)
+    image_objects = ObjectImageListSerializer(many=True, read_only=True)
+    location = LocationNameSerializer(read_only=True)
+    currency = CurrencyNameSerializer(read_only=True)
+
+    class Meta:
+        model = models.LocationObject
+        fields = [
+            "id",
+            "name",
+            "location",
+            "object_type",
+            "object_kind",
+            "image_objects",
+            "currency",
+            "reviews_count",
+            "rating",
+            "score",
+        ]
+
+
 class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
         model = user_models.User
@@ -260,7 +296,8 @@ class LocationObjectCreateSerializer(serializers.ModelSerializer):
 
     uploaded_images = serializers.ListField(
         child=serializers.ImageField(
-            max_length=1000000, allow_empty_file=False, use_url=False
+            max_length=1000000, allow_empty_file=False, use_url=False,
+            validators=[validate_image_pixels],
         ),
         write_only=True,
     )
@@ -312,7 +349,7 @@ class LocationObjectCreateSerializer(serializers.ModelSerializer):
 
 class ObjectShortSerializer(serializers.ModelSerializer):
     location = LocationNameSerializer(read_only=True)
-    image_objects = ObjectImageSerializer(read_only=True, many=True)
+    image_objects = ObjectImageListSerializer(read_only=True, many=True)
 
     class Meta:
         model = models.LocationObject
@@ -348,6 +385,9 @@ class VendorAnalyticsSerializer(serializers.ModelSerializer):
     total_revenue_all_time = serializers.IntegerField(read_only=True)
     total_revenue_current_month = serializers.IntegerField(read_only=True)
     total_views = serializers.IntegerField(read_only=True)
+    period_clients = serializers.IntegerField(read_only=True)
+    period_revenue = serializers.IntegerField(read_only=True)
+    period_views = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.LocationObject
@@ -357,7 +397,10 @@ class VendorAnalyticsSerializer(serializers.ModelSerializer):
             "total_clients_current_month",
             "total_revenue_all_time",
             "total_revenue_current_month",
-            "total_views"
+            "total_views",
+            "period_clients",
+            "period_revenue",
+            "period_views",
         ]
 
 
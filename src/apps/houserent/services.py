@@ -2,7 +2,11 @@ import datetime
 from apps.common.services import Service
 from apps.common.mixins import SearchByNameMixin
 from apps.common.exceptions import UnifiedErrorResponse
-from apps.houserent import models
+from apps.analytics import models as analytics_models
+from apps.analytics.services import VendorRevenueService, VendorStatsService
+from apps.houserent import constants, models
+from apps.houserent.ranking import mark_dirty, pop_dirty
+from apps.reviews import constants as review_constants
 from apps.reviews import models as review_models
 from apps.travels import models as travel_models
 from apps.profiles.models import user as user_models
@@ -13,7 +17,6 @@ from django.db.models import (
     Case,
     When,
     Value,
-    IntegerField,
     Count,
     Exists,
     OuterRef,
@@ -21,7 +24,8 @@ from django.db.models import (
     F,
     Subquery, Avg,
 )
-from django.db.models.functions import Extract, Coalesce, TruncDay
+from django.db import transaction
+from django.db.models.functions import Extract, Coalesce
 from django.utils import timezone
 from rest_framework import status, response
 
@@ -41,6 +45,16 @@ class PlacementService(Service, SearchByNameMixin):
             queryset = queryset.filter(name__icontains=name)
         return queryset
 
+    @staticmethod
+    def subtree_q(placement, prefix="placement"):
+        return Q(
+            **{
+                f"{prefix}__tree_id": placement.tree_id,
+                f"{prefix}__lft__gte": placement.lft,
+                f"{prefix}__rght__lte": placement.rght,
+            }
+        )
+
 
 class LocationService(Service):
     model = models.Location
@@ -70,6 +84,122 @@ class ObjectPriceService(Service):
     model = models.ObjectPrice
 
 
+class ObjectAvailabilityService(Service):
+    model = models.ObjectAvailability
+    object_model = models.LocationObject
+    price_model = models.ObjectPrice
+
+    @classmethod
+    def build_rows(cls, location_objects, prices):
+        objects_by_id = {obj.id: obj for obj in location_objects}
+        rows = {}
+        for price in prices:
+            location_object = objects_by_id.get(price.object_id)
+            if location_object is None:
+                continue
+            day = price.start_date
+            while day <= price.end_date:
+                key = (price.object_id, day)
+                if key not in rows:
+                    rows[key] = cls.model(
+                        object_id=price.object_id,
+                        placement_id=location_object.location.placement_id,
+                        object_kind_id=location_object.object_kind_id,
+                        object_type_id=location_object.object_type_id,
+                        date=day,
+                        price=price.price,
+                    )
+                day += datetime.timedelta(days=1)
+        return rows.values()
+
+    @classmethod
+    def refresh_objects(cls, object_ids):
+        object_ids = list(object_ids)
+        location_objects = (
+            cls.object_model.objects.filter(id__in=object_ids, is_deleted=False)
+            .select_related("location")
+            .only("id", "object_kind_id", "object_type_id", "location__placement_id")
+        )
+        prices = cls.price_model.objects.filter(
+            object_id__in=object_ids, is_deleted=False
+        ).order_by("start_date", "created_at")
+
+        with transaction.atomic():
+            cls.model.objects.filter(object_id__in=object_ids).delete()
+            cls.model.objects.bulk_create(
+                cls.build_rows(location_objects, prices), batch_size=1000
+            )
+            mark_dirty(object_ids)
+
+    @classmethod
+    def rebuild(cls, chunk_size=500):
+        cls.model.objects.all().delete()
+        object_ids = list(
+            cls.object_model.objects.filter(is_deleted=False).values_list("id", flat=True)
+        )
+        for index in range(0, len(object_ids), chunk_size):
+            cls.refresh_objects(object_ids[index:index + chunk_size])
+        return len(object_ids)
+
+    @classmethod
+    def update_location_placement(cls, location):
+        cls.model.objects.filter(object__location_id=location.id).update(
+            placement_id=location.placement_id
+        )
+
+
+class PriceCalendarService(Service):
+    model = models.ObjectAvailability
+
+    @classmethod
+    def get_prices(cls, object_ids, dates):
+        rows = cls.model.objects.filter(
+            object_id__in=object_ids, date__in=dates
+        ).values_list("object_id", "date", "price")
+        return {(object_id, date): price for object_id, date, price in rows}
+
+    @classmethod
+    def annotate_price(cls, queryset, date, object_path=None, name="current_price"):
+        """Annotate each row with the object's calendar price on ``date``.
+
+        ``date`` is a value or an ``F()`` over the outer queryset, such as the
+        end date of the order's trip.
+        """
+        if isinstance(date, F):
+            date = OuterRef(date.name)
+        price = cls.model.objects.filter(
+            object_id=OuterRef(object_path or "pk"), date=date
+        ).values("price")[:1]
+        return queryset.annotate(**{name: Subquery(price)})
+
+
+class StayQuoteService(Service):
+    model = models.ObjectAvailability
+
+    @staticmethod
+    def get_nights(start_date, end_date):
+        checkout = max(end_date, start_date + datetime.timedelta(days=1))
+        return checkout, (checkout - start_date).days
+
+    @classmethod
+    def get_queryset(cls, start_date, end_date, *args, fields=("object_id",), **kwargs):
+        checkout, nights = cls.get_nights(start_date, end_date)
+        return (
+            cls.model.objects.filter(
+                *args, date__gte=start_date, date__lt=checkout, **kwargs
+            )
+            .values(*fields)
+            .annotate(nights=Count("id"), total_price=Sum("price"))
+            .filter(nights=nights)
+            .order_by()
+        )
+
+    @classmethod
+    def quote(cls, object_ids, start_date, end_date):
+        quotes = cls.get_queryset(start_date, end_date, object_id__in=object_ids)
+        return {quote["object_id"]: quote["total_price"] for quote in quotes}
+
+
 class ObjectTypeService(Service):
     model = models.ObjectType
 
@@ -90,6 +220,7 @@ class LocationObjectService(Service):
     review_model = review_models.ObjectReview
     order_model = travel_models.Orders
     offer_model = travel_models.TravelOffer
+    stats_model = analytics_models.VendorObjectDailyStats
 
     @classmethod
     def delete_prices_from_objects(cls, object_price_id):
@@ -140,6 +271,7 @@ class LocationObjectService(Service):
             for price in prices_data
         ]
         cls.price_model.objects.bulk_create(price_to_create)
+        ObjectAvailabilityService.refresh_objects([location_object.id])
         images_to_create = [
             cls.image_model(object=location_object, image=img) for img in images_data
         ]
@@ -159,29 +291,18 @@ class LocationObjectService(Service):
         unchecked_exists = Exists(
             cls.check_model.objects.filter(object_id=OuterRef("pk"), is_checked=False)
         )
-        price_subquery = (
-            cls.price_model.objects.filter(
-                object_id=OuterRef("pk"),
-                start_date__month=date_month,
-                start_date__day__lte=date_day,
-                end_date__month=date_month,
-                end_date__day__gte=date_day,
-            )
-            .order_by("start_date")
-            .values("price")[:1]
-        )
 
         queryset = (
             cls.model.objects.filter(*args, **kwargs)
             .select_related("object_type", "object_kind")
             .prefetch_related("location", prefetches["objects_images_prefetch"])
             .annotate(
-                current_price=Subquery(price_subquery, output_field=IntegerField()),
                 is_checked=~unchecked_exists,
                 objects_count=Count("location__object_locations", distinct=True),
             )
         )
-        return queryset
+        queryset = PriceCalendarService.annotate_price(queryset, date)
+        return ObjectRankingService.order_by_score(request, queryset)
 
     @classmethod
     def get_prefetches(cls):
@@ -203,26 +324,21 @@ class LocationObjectService(Service):
         return datetime.datetime(now.year, now.month, 1)
 
     @classmethod
-    def get_total_clients_subquery(cls, match_field, date_filter=None):
-        queryset = cls.order_model.objects.filter(match_object_id=OuterRef(match_field))
+    def get_stats_subquery(cls, match_field, total_field, date_filter=None):
+        queryset = cls.stats_model.objects.filter(object_id=OuterRef(match_field))
         if date_filter:
-            queryset = queryset.filter(created_at__gte=date_filter)
+            queryset = queryset.filter(day__gte=date_filter)
         return Subquery(
-            queryset.annotate(
-                total=Count("offers", filter=Q(offers__is_payed=True), distinct=True)
-            ).values("total")[:1]
+            queryset.values("object_id").annotate(total=Sum(total_field)).values("total")[:1]
         )
 
+    @classmethod
+    def get_total_clients_subquery(cls, match_field, date_filter=None):
+        return cls.get_stats_subquery(match_field, "clients", date_filter)
+
     @classmethod
     def get_total_revenue_subquery(cls, match_field, date_filter=None):
-        queryset = cls.order_model.objects.filter(match_object_id=OuterRef(match_field))
-        if date_filter:
-            queryset = queryset.filter(created_at__gte=date_filter)
-        return Subquery(
-            queryset.annotate(
-                total=Sum("offers__price", filter=Q(offers__is_payed=True))
-            ).values("total")[:1]
-        )
+        return cls.get_stats_subquery(match_field, "revenue", date_filter)
 
     @classmethod
     def get_queryset_for_list(cls, request, *args, **kwargs):
@@ -245,7 +361,7 @@ class LocationObjectService(Service):
             .filter(vendor_id=request.user.vendor.id)
             .select_related("location__placement", "object_kind", "object_type")
         )
-        return queryset
+        return ObjectRankingService.order_by_score(request, queryset)
 
     @classmethod
     def get_queryset_for_detail(cls, *args, **kwargs):
@@ -260,14 +376,12 @@ class LocationObjectService(Service):
             .prefetch_related(
                 prefetches["objects_images_prefetch"],
                 prefetches["objects_prices_prefetch"],
-                prefetches["reviews_prefetch"],
                 "location__facility",
                 "facility",
             )
             .annotate(
                 objects_count=Count("vendor__vendors", distinct=True),
                 is_checked=~unchecked_exists,
-                reviews_count=Count("object_reviews", distinct=True),
                 total_clients_all_time=Coalesce(
                     cls.get_total_clients_subquery("pk"), 0
                 ),
@@ -323,11 +437,14 @@ class LocationObjectService(Service):
 
     @classmethod
     def update_images(cls, instance, images_data):
-        cls.image_model.objects.filter(object=instance).delete()
+        # New rows are stored before the old ones are deleted, so photos that
+        # were uploaded again keep their shared file instead of re-compressing.
+        old_images = list(cls.image_model.objects.filter(object=instance).values_list("id", flat=True))
         images_to_create = [
             cls.image_model(object=instance, image=img) for img in images_data
         ]
         cls.image_model.objects.bulk_create(images_to_create)
+        cls.image_model.objects.filter(id__in=old_images).delete()
 
     @classmethod
     def update_facilities(cls, instance, facilities_data):
@@ -349,36 +466,11 @@ class LocationObjectService(Service):
             cls.check_model.objects.create(object=instance, choice="updated")
 
     @classmethod
-    def calculate_vendor_analytics(cls, *args, **kwargs):
-        start_of_month = cls.get_start_of_month()
-        queryset = cls.model.objects.filter(*args, **kwargs).annotate(
-            object_total_clients_all_time=Coalesce(
-                cls.get_total_clients_subquery("orders__match_object_id"), 0
-            ),
-            object_total_clients_current_month=Coalesce(
-                cls.get_total_clients_subquery("orders__match_object_id", start_of_month), 0
-            ),
-            object_total_revenue_all_time=Coalesce(
-                cls.get_total_revenue_subquery("orders__match_object_id"), 0
-            ),
-            object_total_revenue_current_month=Coalesce(
-                cls.get_total_revenue_subquery("orders__match_object_id", start_of_month), 0
-            ),
-            object_total_views=Coalesce(Count(
-                'object_views',
-                distinct=True
-            ), 0))
-
-        aggregated_data = queryset.aggregate(
-            total_clients_all_time=Sum('object_total_clients_all_time'),
-            total_clients_current_month=Sum('object_total_clients_current_month'),
-            total_revenue_all_time=Sum('object_total_revenue_all_time'),
-            total_revenue_current_month=Sum('object_total_revenue_current_month'),
-            total_views=Sum('object_total_views')
+    def calculate_vendor_analytics(cls, request, vendor_id):
+        return VendorStatsService.get_totals(
+            vendor_id, cls.get_start_of_month().date(), **VendorStatsService.get_period(request)
         )
 
-        return aggregated_data
-
     @staticmethod
     def get_start_date_from_filter(date_filter):
         now = timezone.now()
@@ -393,20 +485,165 @@ class LocationObjectService(Service):
             return None
 
     @classmethod
-    def get_offers(cls, request, *args, **kwargs):
-        date_filter = request.query_params.get("date", "all")
-        start_date = cls.get_start_date_from_filter(date_filter)
-        queryset = cls.offer_model.objects.filter(*args, **kwargs)
+    def get_offers(cls, request, vendor_id):
+        resolution = VendorRevenueService.get_resolution(request)
+        start_date = cls.get_start_date_from_filter(request.query_params.get("date", "all"))
+        date_range = VendorRevenueService.get_range(
+            vendor_id,
+            default_start=start_date.date() if start_date else None,
+            resolution=resolution,
+            **VendorStatsService.get_period(request)
+        )
+        if date_range is None:
+            return []
+        return VendorRevenueService.get_series(vendor_id, resolution, *date_range)
 
-        if start_date:
-            queryset = queryset.filter(order__travel_detail__date__end_date__gte=start_date)
 
-        queryset = (queryset
-                    .select_related('order__travel_detail__date')
-                    .annotate(date=TruncDay('order__travel_detail__date__end_date'))
-                    .values('date').annotate(total_price=Sum('price'))
-                    .order_by('date')
-                    )
+class ObjectRankingService(Service):
+    """Stored ranking score of objects.
+
+    The score mixes the Bayesian review rating, conversion of orders into
+    paid offers, recent views and the price against objects of the same type
+    in the same placement. Objects touched by reviews, views, payments,
+    orders or prices are queued in a Redis set and rescored in batches, and
+    a periodic full pass ages out the moving window.
+    """
+    model = models.LocationObject
+    availability_model = models.ObjectAvailability
+    order_model = travel_models.Orders
+    stats_model = analytics_models.VendorObjectDailyStats
+
+    @staticmethod
+    def get_score(rating, views, orders, clients, price, peer_price):
+        weights = constants.RANKING_WEIGHTS
+        conversion = (
+            clients + constants.RANKING_CONVERSION_PRIOR * constants.RANKING_CONVERSION_WEIGHT
+        ) / (orders + constants.RANKING_CONVERSION_WEIGHT)
+        components = {
+            "rating": rating / review_constants.RATING_MAX,
+            "conversion": min(conversion, 1),
+            "popularity": views / (views + constants.RANKING_VIEWS_HALF),
+            "price": peer_price / (peer_price + price) if price and peer_price else 0.5,
+        }
+        return sum(weights[name] * value for name, value in components.items())
+
+    @classmethod
+    def refresh(cls, object_ids):
+        object_ids = list(object_ids)
+        today = timezone.now().date()
+        since = today - datetime.timedelta(days=constants.RANKING_WINDOW_DAYS)
+        price_window = {
+            "date__gte": today,
+            "date__lt": today + datetime.timedelta(days=constants.RANKING_PRICE_HORIZON_DAYS),
+        }
+
+        location_objects = list(
+            cls.model.objects.filter(id__in=object_ids)
+            .select_related("location")
+            .only("id", "rating", "object_type_id", "location__placement_id")
+        )
+        activity = {
+            row["object_id"]: row
+            for row in cls.stats_model.objects.filter(object_id__in=object_ids, day__gte=since)
+            .values("object_id")
+            .annotate(views=Sum("views"), clients=Sum("clients"))
+            .order_by()
+        }
+        orders = dict(
+            cls.order_model.objects.filter(match_object_id__in=object_ids, created_at__gte=since)
+            .values("match_object_id")
+            .annotate(total=Count("id"))
+            .values_list("match_object_id", "total")
+            .order_by()
+        )
+        prices = dict(
+            cls.availability_model.objects.filter(object_id__in=object_ids, **price_window)
+            .values("object_id")
+            .annotate(price=Avg("price"))
+            .values_list("object_id", "price")
+            .order_by()
+        )
+        peer_prices = {
+            (row["placement_id"], row["object_type_id"]): row["price"]
+            for row in cls.availability_model.objects.filter(
+                placement_id__in={obj.location.placement_id for obj in location_objects},
+                object_type_id__in={obj.object_type_id for obj in location_objects},
+                **price_window,
+            )
+            .values("placement_id", "object_type_id")
+            .annotate(price=Avg("price"))
+            .order_by()
+        }
+
+        empty = {"views": 0, "clients": 0}
+        for location_object in location_objects:
+            row = activity.get(location_object.id, empty)
+            location_object.score = cls.get_score(
+                rating=location_object.rating,
+                views=row["views"],
+                orders=orders.get(location_object.id, 0),
+                clients=row["clients"],
+                price=prices.get(location_object.id),
+                peer_price=peer_prices.get(
+                    (location_object.location.placement_id, location_object.object_type_id)
+                ),
+            )
+        cls.model.objects.bulk_update(location_objects, ["score"], batch_size=500)
+        return len(location_objects)
+
+    @classmethod
+    def refresh_dirty(cls, batch_size=500):
+        refreshed = 0
+        while True:
+            object_ids = pop_dirty(batch_size)
+            if not object_ids:
+                return refreshed
+            refreshed += cls.refresh(object_ids)
+
+    @classmethod
+    def rebuild(cls, chunk_size=500, unscored_only=False):
+        queryset = cls.model.objects.filter(is_deleted=False)
+        if unscored_only:
+            # Computed scores are never 0: the conversion prior keeps them above it.
+            queryset = queryset.filter(score=0)
+        object_ids = list(queryset.values_list("id", flat=True))
+        for index in range(0, len(object_ids), chunk_size):
+            cls.refresh(object_ids[index:index + chunk_size])
+        return len(object_ids)
+
+    @staticmethod
+    def get_limit(request):
+        try:
+            limit = int(request.query_params.get("limit", constants.RANKED_LIST_LIMIT))
+        except ValueError:
+            raise UnifiedErrorResponse(
+                code=status.HTTP_400_BAD_REQUEST, detail="limit must be an integer"
+            )
+        return max(1, min(limit, constants.RANKED_LIST_MAX_LIMIT))
+
+    @classmethod
+    def get_ranked(cls, request, *args, **kwargs):
+        queryset = cls.model.objects.filter(*args, **kwargs)
+        placement_id = request.query_params.get("placement", None)
+        if placement_id is not None:
+            placement = cls.get_or_error(models.Placement, placement_id)
+            queryset = queryset.filter(
+                PlacementService.subtree_q(placement, prefix="location__placement")
+            )
+        for param in ("object_kind", "object_type"):
+            value = request.query_params.get(param, None)
+            if value is not None:
+                queryset = queryset.filter(**{f"{param}_id": value})
+        return (
+            queryset.select_related("location", "object_type", "object_kind", "currency")
+            .prefetch_related(LocationObjectService.get_prefetches()["objects_images_prefetch"])
+            .order_by("-score", "id")[:cls.get_limit(request)]
+        )
+
+    @staticmethod
+    def order_by_score(request, queryset):
+        if request.query_params.get("ordering", None) == "score":
+            return queryset.order_by("-score", "id")
         return queryset
 
 
@@ -437,21 +674,20 @@ class ObjectReviewService(Service):
 
     @staticmethod
     def get_avg_reviews(object):
-        reviews = object.object_reviews.all()
-        if reviews.exists():
-            return {
-                "average_quality": reviews.aggregate(Avg('quality'))['quality__avg'] or 0,
-                "average_conveniences": reviews.aggregate(Avg('conveniences'))['conveniences__avg'] or 0,
-                "average_purity": reviews.aggregate(Avg('purity'))['purity__avg'] or 0,
-                "average_location": reviews.aggregate(Avg('location'))['location__avg'] or 0
-            }
+        count = object.reviews_count
         return {
-            "average_quality": 0,
-            "average_conveniences": 0,
-            "average_purity": 0,
-            "average_location": 0
+            f"average_{criterion}": getattr(object, f"{criterion}_sum") / count if count else 0
+            for criterion in review_constants.RATING_CRITERIA
         }
 
+    @staticmethod
+    def get_general_rating(object):
+        count = object.reviews_count
+        if not count:
+            return 0
+        stars = sum(getattr(object, f"{criterion}_sum") for criterion in review_constants.RATING_CRITERIA)
+        return stars / (count * len(review_constants.RATING_CRITERIA))
+
     @classmethod
     def get_review_check_queryset(cls, request, *args, **kwargs):
         queryset = (cls.check_model.objects
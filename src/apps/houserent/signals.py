@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.houserent import models
+from apps.houserent.services import ObjectAvailabilityService
+
+
+@receiver([post_save, post_delete], sender=models.ObjectPrice)
+def refresh_availability_for_price(sender, instance, **kwargs):
+    ObjectAvailabilityService.refresh_objects([instance.object_id])
+
+
+@receiver(post_save, sender=models.LocationObject)
+def refresh_availability_for_object(sender, instance, **kwargs):
+    ObjectAvailabilityService.refresh_objects([instance.id])
+
+
+@receiver(post_save, sender=models.Location)
+def refresh_availability_for_location(sender, instance, created, **kwargs):
+    if not created:
+        ObjectAvailabilityService.update_location_placement(instance)
+
@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from apps.houserent.services import ObjectRankingService
+
+
+@shared_task
+def refresh_object_scores():
+    return ObjectRankingService.refresh_dirty()
+
+
+@shared_task
+def rebuild_object_scores():
+    return ObjectRankingService.rebuild()
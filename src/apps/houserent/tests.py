@@ -0,0 +1,34 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from redis import RedisError
+
+from apps.common.testing import LOCMEM_CACHES, create_object, create_vendor
+from apps.houserent.models import LocationObject
+from apps.houserent.ranking import push_dirty
+from apps.houserent.services import ObjectRankingService
+
+
+class MarkDirtyTests(SimpleTestCase):
+    @mock.patch('apps.houserent.ranking.get_redis')
+    def test_redis_errors_are_logged(self, get_redis):
+        get_redis.return_value.sadd.side_effect = RedisError('down')
+        with self.assertLogs('apps.houserent.ranking', level='ERROR'):
+            push_dirty(['a', 'b'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UnscoredRebuildTests(TestCase):
+    def test_only_unscored_objects_are_rescored(self):
+        vendor = create_vendor()
+        unscored, scored = create_object(vendor), create_object(vendor)
+        LocationObject.objects.filter(id=unscored.id).update(score=0)
+        LocationObject.objects.filter(id=scored.id).update(score=0.99)
+
+        stdout = StringIO()
+        call_command('ranking_refresh', '--unscored', stdout=stdout)
+        self.assertIn('Scores refreshed for 1 objects.', stdout.getvalue())
+        self.assertGreater(LocationObject.objects.get(id=unscored.id).score, 0)
+        self.assertEqual(LocationObject.objects.get(id=scored.id).score, 0.99)
@@ -43,6 +43,11 @@ urlpatterns = [
         (views.LocationObjectListAPIView.as_view()),
         name="location-objects-list",
     ),
+    path(
+        "objects/ranked/",
+        (views.RankedObjectListAPIView.as_view()),
+        name="objects-ranked-list",
+    ),
     path(
         "objects/<uuid:pk>/",
         (views.LocationObjectDetailAPIView.as_view()),
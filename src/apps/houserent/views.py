@@ -72,6 +72,18 @@ class LocationObjectAPIView(generics.ListAPIView):
         )
 
 
+class RankedObjectListAPIView(generics.ListAPIView):
+    serializer_class = serializers.RankedObjectSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+    schema = schemas.RankedObjectSchema()
+
+    def get_queryset(self):
+        return services.ObjectRankingService.get_ranked(
+            request=self.request, is_deleted=False
+        )
+
+
 class LocationObjectDetailAPIView(generics.RetrieveUpdateAPIView):
     serializer_class = serializers.LocationObjectDetailSerializer
     permission_classes = [permissions.IsVendorOwnerOrReadOnly]
@@ -178,10 +190,11 @@ class VendorAnalyticsAPIView(views.APIView):
     serializer_class = serializers.VendorAnalyticsSerializer
     permission_classes = [permissions.IsVendor]
     pagination_class = None
+    schema = schemas.VendorAnalyticsSchema()
 
     def get(self, request, *args, **kwargs):
         analytics_data = services.LocationObjectService.calculate_vendor_analytics(
-            is_deleted=False,
+            request=request,
             vendor_id=self.request.user.id
         )
         serializer = self.serializer_class(analytics_data)
@@ -197,7 +210,5 @@ class VendorOffersAPIView(generics.ListAPIView):
     def get_queryset(self):
         return services.LocationObjectService.get_offers(
             request=self.request,
-            is_payed=True,
-            is_deleted=False,
-            order__match_object__vendor_id=self.request.user.id,
+            vendor_id=self.request.user.id,
         )
\ No newline at end of file
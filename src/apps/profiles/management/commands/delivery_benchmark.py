@@ -0,0 +1,76 @@
+import json
+import time
+
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.common import presence
+from apps.common.delivery import get_group_name
+from apps.common.redis_pool import get_redis
+
+CONNECTIONS_KEY = 'benchmark_connections'
+EMAIL = 'delivery-benchmark@izde.local'
+
+
+class Command(BaseCommand):
+    help = "Compare WebSocket push latency and Redis commands for presence lookups and group sends"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--messages", type=int, default=200, help="Messages pushed through each delivery path"
+        )
+
+    def handle(self, *args, **options):
+        self.layer_redis = redis.Redis.from_url(settings.CHANNEL_LAYERS['default']['CONFIG']['hosts'][0])
+        results = async_to_sync(self.run)(options["messages"])
+        for label, latency, presence_ops, layer_ops in results:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: {latency:.3f} ms/message, "
+                    f"{presence_ops:.2f} presence Redis commands/message, "
+                    f"{layer_ops:.2f} channel layer Redis commands/message"
+                )
+            )
+
+    async def run(self, messages):
+        channel_layer = get_channel_layer()
+        channel_name = await channel_layer.new_channel()
+        group = get_group_name(CONNECTIONS_KEY, EMAIL)
+        await presence.aregister((CONNECTIONS_KEY,), EMAIL, channel_name)
+        await channel_layer.group_add(group, channel_name)
+        event = {'type': 'send_orders', 'messages': [json.dumps({'benchmark': True})]}
+
+        async def send_via_presence():
+            for name in presence.get_channels(CONNECTIONS_KEY, EMAIL):
+                await channel_layer.send(name.decode('utf-8'), event)
+
+        async def send_via_group():
+            await channel_layer.group_send(group, event)
+
+        results = []
+        try:
+            for label, send in (('presence lookup', send_via_presence), ('group send', send_via_group)):
+                presence_calls = self.count_commands(get_redis())
+                layer_calls = self.count_commands(self.layer_redis)
+                started = time.perf_counter()
+                for _ in range(messages):
+                    await send()
+                    await channel_layer.receive(channel_name)
+                elapsed = time.perf_counter() - started
+                results.append((
+                    label,
+                    elapsed / messages * 1000,
+                    (self.count_commands(get_redis()) - presence_calls) / messages,
+                    (self.count_commands(self.layer_redis) - layer_calls) / messages,
+                ))
+        finally:
+            await channel_layer.group_discard(group, channel_name)
+            await presence.aunregister((CONNECTIONS_KEY,), EMAIL, channel_name)
+        return results
+
+    @staticmethod
+    def count_commands(client):
+        return sum(stats['calls'] for stats in client.info('commandstats').values())
@@ -14,6 +14,8 @@ class RecursiveParentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Placement
         fields = ['name', 'parent']
+        # get_parent reads one more level up the tree.
+        select_related = ['parent']
 
 
 class BookedPaymentAddressSerializer(serializers.ModelSerializer):
@@ -1,8 +1,8 @@
 from rest_framework import serializers
-from django.db.models import Sum, Count
 
 from apps.houserent.models import LocationObject, Placement, Location
 from apps.houserent.serializers import ObjectImageSerializer
+from apps.houserent.services import ObjectReviewService
 from apps.profiles.models.payment import Transaction
 from apps.profiles.serializers.base_serializers import BookedPaymentAddressSerializer
 from apps.profiles.serializers.user import LocationPaymentSerializer, PaymentDetailBudgetSerializer
@@ -81,13 +81,7 @@ class BookedOfferSerializer(serializers.ModelSerializer):
         ]
 
     def get_reviews_quantity(self, travel_offer):
-        return travel_offer.order.match_object.object_reviews.count()
+        return travel_offer.order.match_object.reviews_count
 
     def get_general_rating(self, travel_offer):
-        rating_sum = travel_offer.order.match_object.object_reviews.aggregate(
-            total_rating=Sum('general_rating'),
-            count=Count('id')
-        )
-        if rating_sum['count'] > 0:
-            return rating_sum['total_rating'] / rating_sum['count']
-        return 0
+        return ObjectReviewService.get_general_rating(travel_offer.order.match_object)
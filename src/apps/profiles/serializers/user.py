@@ -14,7 +14,7 @@ from apps.profiles.serializers.base_serializers import BookedPaymentAddressSeria
 from apps.reviews.models import ObjectReview
 from apps.travels.models import TravelOffer, Orders, TravelDetail, TravelDate, TravelBudget
 from apps.travels.serializers import TravelDateCreateSerializer, UserForOrderSerializer
-from core.settings import base
+from apps.common.media import image_url
 
 
 class ProfileUserSerializer(serializers.ModelSerializer):
@@ -128,7 +128,7 @@ class OfferObjectImageSerializer(serializers.ModelSerializer):
         fields = ["id", "image"]
 
     def get_image(self, image):
-        return f"{base.BASE_URL}{image.image.url}"
+        return image_url(image.image)
 
 
 class OfferLocationObjectListSerializer(serializers.ModelSerializer):
@@ -300,6 +300,12 @@ class PaymentDetailSerializer(serializers.ModelSerializer):
             'full_refund_cutoff_hours',
             'partial_refund_cutoff_hours',
         ]
+        # Read by the method fields below.
+        prefetch_related = [
+            'order__match_object__location__facility',
+            'order__match_object__facility',
+            'order__match_object__object_reviews__user',
+        ]
 
     def get_location_amenities(self, offer):
         location_amenities = offer.order.match_object.location.facility.all()
@@ -317,7 +323,7 @@ class PaymentDetailSerializer(serializers.ModelSerializer):
         return serialized_data
 
     def get_reviews_quantity(self, travel_offer):
-        return travel_offer.order.match_object.object_reviews.count()
+        return travel_offer.order.match_object.reviews_count
 
     def get_avg_reviews(self, offer):
         return ObjectReviewService.get_avg_reviews(offer.order.match_object)
@@ -9,6 +9,7 @@ from json2xml import json2xml
 from json2xml.utils import readfromstring
 from rest_framework.response import Response
 
+from apps.common.prefetch import optimize_queryset
 from apps.profiles.serializers.payment import BookedOfferSerializer
 from apps.profiles.serializers.user import PaymentDetailSerializer
 from apps.travels.models import TravelOffer
@@ -213,10 +214,8 @@ class PaymentService:
 
     @classmethod
     def get_payment_detail(cls, offer_id, request):
-        offer = cls.__travel_offer.objects.filter(id=offer_id).prefetch_related(
-            'order__match_object__object_reviews__user',
-        ).select_related(
-            'order__match_object__location__placement__parent',
+        offer = optimize_queryset(
+            cls.__travel_offer.objects.filter(id=offer_id), PaymentDetailSerializer
         ).first()
         serialized_data = PaymentDetailSerializer(offer, context={'request': request}).data
         return Response({'data': serialized_data, 'user_id': offer.order.travel_detail.user.id})
@@ -1,49 +1,33 @@
 import json
+import uuid
+from collections import defaultdict
 from datetime import timedelta
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import redis
-from decouple import config
-from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.db import transaction as db_transaction
+from django.db.models import F
+from apps.common.delivery import ChannelBatch
+from apps.common.prefetch import optimize_queryset
+from apps.common.presence import get_channels_many
 from apps.profiles.models.payment import Transaction
 from apps.profiles.serializers.user import OfferSerializer
 from apps.profiles.tasks.sendCode import send_verification_code_task
 from apps.travels.models import Orders, TravelOffer
 from celery import shared_task
-from apps.vendors.serializers import OrderSerializer
-from apps.houserent.models import ObjectPrice
+from apps.vendors.services import OrderPayloadService
 
 
 @shared_task
 def send_order(order_id, vendor_email):
-    prices = ObjectPrice.objects.filter(
-        object_id=OuterRef('match_object__id'),
-        start_date__lte=OuterRef('travel_detail__date__end_date'),
-        end_date__gte=OuterRef('travel_detail__date__end_date')
-    ).order_by('start_date')
-
-    price_subquery = Subquery(prices.values('price')[:1])
-
-    order_object = Orders.objects.filter(id=order_id, is_deleted=False, is_sent=False).annotate(
-        matched_price=price_subquery
-    ).first()
+    order_object = Orders.objects.filter(id=order_id, is_deleted=False, is_sent=False).first()
 
     order_object.created_at += timedelta(minutes=5)
     order_object.save()
-    serialized_data = OrderSerializer(order_object).data
-    json_data = json.dumps(serialized_data, ensure_ascii=False)
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_name = r.hget('vendor_connections', vendor_email)
-    channel_layer = get_channel_layer()
-    if channel_name:
-        decoded_data = channel_name.decode('utf-8')
-        order_object.is_sent = True
-        order_object.save()
-        async_to_sync(channel_layer.send)(decoded_data, {
-            'type': 'send_orders',
-            'message': json_data
-        })
+    json_data = OrderPayloadService.get_payloads([order_object.id])[0]
+    connected = get_channels_many('vendor_connections', [vendor_email])
+    batch = ChannelBatch()
+    batch.publish('vendor_connections', vendor_email, 'send_orders', json_data)
+    batch.flush()
+    mark_delivered(Orders, {vendor_email: [order_object.id]}, 'vendor_connections', connected)
 
 
 @shared_task
@@ -55,88 +39,151 @@ def send_orders(vendor_email):
         approved=None,
     )
 
-    serialized_data = OrderSerializer(orders, many=True).data
-    orders.update(is_sent=True)
-    json_data = json.dumps(serialized_data, ensure_ascii=False)
+    order_ids = list(orders.values_list('id', flat=True))
+    json_data = OrderPayloadService.get_list_payload(order_ids)
+
+    batch = ChannelBatch()
+    if batch.push('vendor_connections', vendor_email, 'send_orders', json_data):
+        Orders.objects.filter(id__in=order_ids).update(is_sent=True)
+        batch.flush()
+
 
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_name = r.hget('vendor_connections', vendor_email)
-    decoded_data = channel_name.decode('utf-8')
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(decoded_data, {
-        'type': 'send_orders',
-        'message': json_data
-    })
+def publish_vendor_orders(order_ids_by_vendor, batch):
+    """Queue every vendor's new orders on ``batch`` with one update and one payload fetch.
+
+    Returns the queued order ids per vendor, for ``mark_delivered`` once the
+    batch is flushed.
+    """
+    order_ids = [order_id for ids in order_ids_by_vendor.values() for order_id in ids]
+    fresh_ids = set(
+        Orders.objects.filter(id__in=order_ids, is_deleted=False, is_sent=False).values_list('id', flat=True)
+    )
+    published = {}
+    if not fresh_ids:
+        return published
+    Orders.objects.filter(id__in=fresh_ids).update(
+        created_at=F('created_at') + timedelta(minutes=5),
+        updated_at=timezone.now(),
+    )
+    payloads = OrderPayloadService.get_payloads_by_id(fresh_ids)
+    for vendor_email, ids in order_ids_by_vendor.items():
+        ids = [order_id for order_id in ids if uuid.UUID(str(order_id)) in fresh_ids]
+        if ids:
+            batch.publish(
+                'vendor_connections', vendor_email, 'send_orders',
+                OrderPayloadService.get_list_payload(ids, payloads),
+            )
+            published[vendor_email] = ids
+    return published
+
+
+def mark_delivered(model, ids_by_email, connections_key, connected):
+    """Mark sent the rows of recipients that were connected before and after the flush.
+
+    ``connected`` is the presence lookup taken before the flush. A recipient
+    that was offline at either point may have missed the group frame, so its
+    rows stay unsent and the task run on connect replays them.
+    """
+    connected = connected.keys() & get_channels_many(connections_key, ids_by_email).keys()
+    ids = [object_id for email in connected for object_id in ids_by_email[email]]
+    if ids:
+        model.objects.filter(id__in=ids).update(is_sent=True)
 
 
 @shared_task
-def deleted_expired_orders(order_id, email, type_connections, send_type):
-    orders = Orders.objects.filter(
-        id=order_id,
-        is_deleted=False,
-        approved=None,
+def send_matched_orders(order_ids_by_vendor):
+    """Push the orders of one travel request to all matched vendors in one batch."""
+    connected = get_channels_many('vendor_connections', order_ids_by_vendor)
+    batch = ChannelBatch()
+    published = publish_vendor_orders(order_ids_by_vendor, batch)
+    batch.flush()
+    mark_delivered(Orders, published, 'vendor_connections', connected)
+
+
+def notify_expired(ids_by_email, type_connections, send_type, batch):
+    # One frame per id, as the per-object tasks always sent them.
+    for email, ids in ids_by_email.items():
+        for object_id in ids:
+            batch.publish(type_connections, email, send_type, json.dumps(object_id, ensure_ascii=False))
+
+
+def claim_expired(queryset, recipient_field):
+    """Soft-delete the rows of ``queryset`` and return their ids per recipient.
+
+    Rows are locked with ``SKIP LOCKED`` and the locked rows are re-checked
+    against the predicate, so a row accepted concurrently is neither deleted
+    nor reported.
+    """
+    ids_by_email = defaultdict(list)
+    with db_transaction.atomic():
+        rows = queryset.select_for_update(skip_locked=True, of=('self',)).values_list('id', recipient_field)
+        for object_id, email in rows:
+            ids_by_email[email].append(str(object_id))
+        if ids_by_email:
+            queryset.filter(
+                id__in=[object_id for ids in ids_by_email.values() for object_id in ids],
+            ).update(is_deleted=True)
+    return ids_by_email
+
+
+@shared_task
+def sweep_expired():
+    """Expire every order and offer whose deadline has passed.
+
+    Deadlines live in the indexed ``expires_at`` column, so one periodic run
+    replaces the per-object countdown tasks.
+    """
+    now = timezone.now()
+    batch = ChannelBatch()
+
+    orders_by_vendor = claim_expired(
+        Orders.objects.filter(expires_at__lte=now, is_deleted=False, approved=None),
+        'match_object__vendor__email',
+    )
+    notify_expired(orders_by_vendor, 'deleted_order_connections', 'send_deleted_order_id', batch)
+
+    offers_by_user = claim_expired(
+        TravelOffer.objects.filter(expires_at__lte=now, is_deleted=False, is_accepted=None),
+        'order__travel_detail__user__email',
     )
-    if orders.exists():
-        order = orders[0]
-        r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                        username='default')
-        channel_layer = get_channel_layer()
-        channel_name = r.hget(type_connections, email)
-        if channel_name:
-            decoded_data = channel_name.decode('utf-8')
-            async_to_sync(channel_layer.send)(decoded_data, {
-                'type': send_type,
-                'message': json.dumps(str(order.id), ensure_ascii=False)
-            })
-        order.is_deleted = True
-        order.save()
+    notify_expired(offers_by_user, 'deleted_offers_connections', 'send_deleted_offers_id', batch)
+
+    batch.flush()
 
 
 @shared_task
 def send_offer(offer_id, user_email):
-    order_object = TravelOffer.objects.get(id=offer_id, is_deleted=False, is_sent=False)
+    order_object = optimize_queryset(TravelOffer.objects.all(), OfferSerializer).get(
+        id=offer_id, is_deleted=False, is_sent=False
+    )
     order_object.created_at += timedelta(minutes=5)
     order_object.save()
 
     serialized_data = OfferSerializer(order_object).data
     json_data = json.dumps(serialized_data, ensure_ascii=False)
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_name = r.hget('user_connections', user_email)
-    channel_layer = get_channel_layer()
-    if channel_name:
-        decoded_data = channel_name.decode('utf-8')
-        order_object.is_sent = True
-        order_object.save()
-        async_to_sync(channel_layer.send)(decoded_data, {
-            'type': 'send_offers',
-            'message': json_data
-        })
+    connected = get_channels_many('user_connections', [user_email])
+    batch = ChannelBatch()
+    batch.publish('user_connections', user_email, 'send_offers', json_data)
+    batch.flush()
+    mark_delivered(TravelOffer, {user_email: [order_object.id]}, 'user_connections', connected)
 
 
 @shared_task
 def send_offers(user_email):
-    orders = TravelOffer.objects.filter(
+    orders = list(optimize_queryset(TravelOffer.objects.filter(
         is_sent=False,
         is_deleted=False,
         is_accepted=None,
         order__travel_detail__user__email=user_email,
-    )
+    ), OfferSerializer))
 
     serialized_data = OfferSerializer(orders, many=True).data
-    orders.update(is_sent=True)
     json_data = json.dumps(serialized_data, ensure_ascii=False)
 
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_name = r.hget('user_connections', user_email)
-    decoded_data = channel_name.decode('utf-8')
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(decoded_data, {
-        'type': 'send_offers',
-        'message': json_data
-    })
+    batch = ChannelBatch()
+    if batch.push('user_connections', user_email, 'send_offers', json_data):
+        TravelOffer.objects.filter(id__in=[order.id for order in orders]).update(is_sent=True)
+        batch.flush()
 
 
 @shared_task
@@ -152,37 +199,9 @@ def send_deleted_offers(user_email):
 
     orders.update(is_sent=True)
 
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_name = r.hget('deleted_offers_connections', user_email)
-    decoded_data = channel_name.decode('utf-8')
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(decoded_data, {
-        'type': 'send_deleted_offers_id',
-        'message': json.dumps(order_ids_str, ensure_ascii=False)
-    })
-
-
-@shared_task
-def deleted_expired_offers(offer_id, email, type_connections, send_type):
-    order_or_offer = TravelOffer.objects.filter(
-        id=offer_id,
-        is_deleted=False,
-        is_accepted=None,
-    ).first()
-    if order_or_offer:
-        r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                        username='default')
-        channel_layer = get_channel_layer()
-        channel_name = r.hget(type_connections, email)
-        if channel_name:
-            decoded_data = channel_name.decode('utf-8')
-            async_to_sync(channel_layer.send)(decoded_data, {
-                'type': send_type,
-                'message': json.dumps(str(order_or_offer.id), ensure_ascii=False)
-            })
-        order_or_offer.is_deleted = True
-        order_or_offer.save()
+    batch = ChannelBatch()
+    batch.push('deleted_offers_connections', user_email, 'send_deleted_offers_id', json.dumps(order_ids_str, ensure_ascii=False))
+    batch.flush()
 
 
 @shared_task
@@ -196,18 +215,13 @@ def send_payment_status(transaction_id):
     else:
         offer.is_payed = False
         offer.save()
-    r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                    username='default')
-    channel_layer = get_channel_layer()
-    channel_name = r.hget('payment_connections', offer.order.travel_detail.user.email)
-    if channel_name:
-        transaction.is_sent = True
-        transaction.save()
-        decoded_data = channel_name.decode('utf-8')
-        async_to_sync(channel_layer.send)(decoded_data, {
-            'type': 'send_payment_status',
-            'message': json.dumps({'status': offer.is_payed}, ensure_ascii=False)
-        })
+    user_email = offer.order.travel_detail.user.email
+    connected = get_channels_many('payment_connections', [user_email])
+    batch = ChannelBatch()
+    message = json.dumps({'status': offer.is_payed}, ensure_ascii=False)
+    batch.publish('payment_connections', user_email, 'send_payment_status', message)
+    batch.flush()
+    mark_delivered(Transaction, {user_email: [transaction.id]}, 'payment_connections', connected)
 
 
 @shared_task
@@ -216,15 +230,9 @@ def send_some_payment_status(user_email):
     print(transaction)
     if transaction:
         print(transaction)
-        r = redis.Redis(host=config('redis_host'), port=6379, db=0, password='myPass',
-                        username='default')
-        channel_layer = get_channel_layer()
-        channel_name = r.hget('payment_connections', user_email)
-        if channel_name:
+        batch = ChannelBatch()
+        message = json.dumps({'status': transaction.travel_offer.is_payed}, ensure_ascii=False)
+        if batch.push('payment_connections', user_email, 'send_payment_status', message):
             transaction.is_sent = True
             transaction.save()
-            decoded_data = channel_name.decode('utf-8')
-            async_to_sync(channel_layer.send)(decoded_data, {
-                'type': 'send_payment_status',
-                'message': json.dumps({'status': transaction.travel_offer.is_payed}, ensure_ascii=False)
-            })
+            batch.flush()
@@ -0,0 +1,217 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.common.testing import (
+    LOCMEM_CACHES,
+    create_object,
+    create_offer,
+    create_order,
+    create_user,
+    create_vendor,
+)
+from apps.houserent.models import LocationFacility, ObjectFacility, ObjectImage, Placement
+from apps.profiles.models.payment import Transaction
+from apps.profiles.tasks.broker import (
+    send_matched_orders,
+    send_offer,
+    send_offers,
+    send_order,
+    send_orders,
+    send_payment_status,
+    send_some_payment_status,
+)
+from apps.reviews.models import ObjectReview
+from apps.travels.models import Orders, TravelOffer
+
+
+def connected(connections_key, emails):
+    return {email: [b'channel'] for email in emails}
+
+
+def disconnected(connections_key, emails):
+    return {}
+
+
+def add_object_details(location_object, count):
+    """Give an object `count` more images, facilities and reviews."""
+    for _ in range(count):
+        number = ObjectImage.objects.count()
+        ObjectImage.objects.create(object=location_object, image=f'cas/00/extra-{number}.webp')
+        location_object.facility.add(ObjectFacility.objects.create(name=f'Object facility {number}'))
+        location_object.location.facility.add(LocationFacility.objects.create(name=f'Location facility {number}'))
+        ObjectReview.objects.create(
+            user=create_user(),
+            object=location_object,
+            quality=5,
+            conveniences=4,
+            purity=5,
+            location=3,
+            comment='-',
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PaymentDetailQueryCountTests(TestCase):
+    """The payment detail loads every relation its serializer reads up front."""
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Placement.objects.create(name='Country')
+        region = Placement.objects.create(name='Region', parent=country)
+        city = Placement.objects.create(name='City', parent=region)
+        cls.user = create_user()
+        cls.location_object = create_object(create_vendor(), placement=city)
+        cls.offer = create_offer(create_order(cls.location_object, user=cls.user))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/payments/payment_detail/{self.offer.id}/'
+
+    def test_query_count_does_not_grow_with_object_details(self):
+        add_object_details(self.location_object, 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        add_object_details(self.location_object, 4)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.url)
+        data = response.data['data']
+        self.assertEqual(len(data['image_objects']), 6)
+        self.assertEqual(len(data['object_amenities']), 5)
+        self.assertEqual(len(data['location_amenities']), 5)
+        self.assertEqual(len(data['reviews']), 5)
+        self.assertEqual(data['reviews_quantity'], 5)
+        self.assertEqual(data['placement']['parent']['parent']['name'], 'Country')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('apps.profiles.tasks.broker.get_channels_many', connected)
+@mock.patch('apps.profiles.tasks.broker.ChannelBatch')
+class OfferPushQueryCountTests(TestCase):
+    """Offer pushes serialize with a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.vendor = create_vendor()
+
+    def add_offers(self, count, images=1):
+        return [
+            create_offer(create_order(create_object(self.vendor, images=images), user=self.user))
+            for _ in range(count)
+        ]
+
+    def test_send_offer(self, channel_batch):
+        small_offer, = self.add_offers(1)
+        with CaptureQueriesContext(connection) as queries:
+            send_offer(str(small_offer.id), self.user.email)
+
+        large_offer, = self.add_offers(1, images=5)
+        with self.assertNumQueries(len(queries)):
+            send_offer(str(large_offer.id), self.user.email)
+        self.assertTrue(TravelOffer.objects.get(id=large_offer.id).is_sent)
+
+    def test_send_offers(self, channel_batch):
+        self.add_offers(1)
+        with CaptureQueriesContext(connection) as queries:
+            send_offers(self.user.email)
+
+        offers = self.add_offers(4, images=3)
+        with self.assertNumQueries(len(queries)):
+            send_offers(self.user.email)
+        self.assertFalse(TravelOffer.objects.filter(id__in=[offer.id for offer in offers], is_sent=False).exists())
+        self.assertEqual(channel_batch.return_value.push.call_count, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('apps.profiles.tasks.broker.ChannelBatch')
+class OfflinePushTests(TestCase):
+    """A push made while the user is offline is replayed when they connect."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.offer = create_offer(create_order(create_object(create_vendor()), user=cls.user))
+
+    def test_offer(self, channel_batch):
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', disconnected):
+            send_offer(str(self.offer.id), self.user.email)
+        self.assertFalse(TravelOffer.objects.get(id=self.offer.id).is_sent)
+
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', connected):
+            send_offers(self.user.email)
+        pushed = channel_batch.return_value.push.call_args.args
+        self.assertEqual([offer['id'] for offer in json.loads(pushed[3])], [str(self.offer.id)])
+        self.assertTrue(TravelOffer.objects.get(id=self.offer.id).is_sent)
+
+    def test_offer_is_kept_when_nobody_picks_up_the_replay(self, channel_batch):
+        channel_batch.return_value.push.return_value = False
+        send_offers(self.user.email)
+        self.assertFalse(TravelOffer.objects.get(id=self.offer.id).is_sent)
+
+    def test_payment_status(self, channel_batch):
+        transaction = Transaction.objects.create(user=self.user, travel_offer=self.offer, pg_result='неуспешно')
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', disconnected):
+            send_payment_status(str(transaction.id))
+        self.assertFalse(Transaction.objects.get(id=transaction.id).is_sent)
+
+        send_some_payment_status(self.user.email)
+        pushed = channel_batch.return_value.push.call_args.args
+        self.assertEqual(json.loads(pushed[3]), {'status': False})
+        self.assertTrue(Transaction.objects.get(id=transaction.id).is_sent)
+
+    def test_connected_payment_status_is_marked_sent(self, channel_batch):
+        transaction = Transaction.objects.create(user=self.user, travel_offer=self.offer, pg_result='неуспешно')
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', connected):
+            send_payment_status(str(transaction.id))
+        self.assertTrue(Transaction.objects.get(id=transaction.id).is_sent)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('apps.profiles.tasks.broker.ChannelBatch')
+class OfflineVendorPushTests(TestCase):
+    """New orders pushed while the vendor is offline are replayed when they connect."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_vendor()
+        cls.other_vendor = create_vendor()
+        cls.order = create_order(create_object(cls.vendor))
+        cls.other_order = create_order(create_object(cls.other_vendor))
+
+    def get_pushed_ids(self, channel_batch):
+        pushed = channel_batch.return_value.push.call_args.args
+        return [order['id'] for order in json.loads(pushed[3])]
+
+    def test_matched_orders(self, channel_batch):
+        def only_other_vendor(connections_key, emails):
+            return {email: [b'channel'] for email in emails if email == self.other_vendor.email}
+
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', only_other_vendor):
+            send_matched_orders({
+                self.vendor.email: [str(self.order.id)],
+                self.other_vendor.email: [str(self.other_order.id)],
+            })
+        self.assertEqual(channel_batch.return_value.publish.call_count, 2)
+        self.assertFalse(Orders.objects.get(id=self.order.id).is_sent)
+        self.assertTrue(Orders.objects.get(id=self.other_order.id).is_sent)
+
+        send_orders(self.vendor.email)
+        self.assertEqual(self.get_pushed_ids(channel_batch), [str(self.order.id)])
+        self.assertTrue(Orders.objects.get(id=self.order.id).is_sent)
+
+    def test_single_order(self, channel_batch):
+        with mock.patch('apps.profiles.tasks.broker.get_channels_many', disconnected):
+            send_order(str(self.order.id), self.vendor.email)
+        self.assertFalse(Orders.objects.get(id=self.order.id).is_sent)
+
+        send_orders(self.vendor.email)
+        self.assertEqual(self.get_pushed_ids(channel_batch), [str(self.order.id)])
+        self.assertTrue(Orders.objects.get(id=self.order.id).is_sent)
@@ -8,3 +8,6 @@ class ReviewsConfig(AppConfig):
 
     verbose_name = _("Панель Отзыва")
     verbose_name_plural = _("Панель Отзывов")
+
+    def ready(self):
+        import apps.reviews.signals
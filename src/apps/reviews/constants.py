@@ -7,3 +7,11 @@ REVIEW_STATUS_CHOICE = (
     )
 
 STARS_CHOICE = ([(i, "★" * i) for i in range(1, 6)])
+
+RATING_CRITERIA = ("quality", "conveniences", "purity", "location")
+
+# Bayesian prior: an object starts as if it had RATING_PRIOR_WEIGHT reviews
+# averaging RATING_PRIOR_MEAN stars, so a few reviews cannot top the ranking.
+RATING_PRIOR_MEAN = 3.5
+RATING_PRIOR_WEIGHT = 5
+RATING_MAX = 5
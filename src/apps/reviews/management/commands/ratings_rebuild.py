@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.reviews.services import ObjectRatingService
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored review counts, sums and ratings of every object"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Objects written per UPDATE batch"
+        )
+
+    def handle(self, *args, **options):
+        objects_count = ObjectRatingService.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Ratings rebuilt for {objects_count} objects."))
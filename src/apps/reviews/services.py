@@ -3,9 +3,14 @@ from rest_framework import status
 
 from apps.common.exceptions import UnifiedErrorResponse
 from apps.common.services import Service
+from apps.houserent import models as houserent_models
+from apps.houserent.ranking import mark_dirty
+from apps.reviews import constants
 from apps.reviews import models as review_models
 from apps.travels import models as travel_models
 from django.db import models as db_models
+from django.db import transaction
+from django.db.models.functions import Coalesce
 
 
 class ReviewService(Service):
@@ -50,3 +55,65 @@ class ReviewService(Service):
     @classmethod
     def create_review(cls, user_id, validated_data):
         return cls.model.objects.create(**validated_data, user_id=user_id)
+
+
+class ObjectRatingService(Service):
+    """Review count, per-criterion sums and Bayesian rating stored on objects.
+
+    Deleted reviews and reviews declined by a moderator are not counted.
+    """
+    model = houserent_models.LocationObject
+    review_model = review_models.ObjectReview
+    fields = ("reviews_count", *(f"{criterion}_sum" for criterion in constants.RATING_CRITERIA), "rating")
+
+    @classmethod
+    def get_counted_reviews(cls):
+        return cls.review_model.objects.filter(is_deleted=False).exclude(review_check__choice="declined")
+
+    @classmethod
+    def get_aggregates(cls):
+        aggregates = {"reviews_count": db_models.Count("id")}
+        for criterion in constants.RATING_CRITERIA:
+            aggregates[f"{criterion}_sum"] = Coalesce(db_models.Sum(criterion), 0)
+        return aggregates
+
+    @staticmethod
+    def get_rating(totals):
+        stars = sum(totals[f"{criterion}_sum"] for criterion in constants.RATING_CRITERIA)
+        return (
+            constants.RATING_PRIOR_WEIGHT * constants.RATING_PRIOR_MEAN
+            + stars / len(constants.RATING_CRITERIA)
+        ) / (constants.RATING_PRIOR_WEIGHT + totals["reviews_count"])
+
+    @classmethod
+    def refresh(cls, object_id):
+        with transaction.atomic():
+            # The row lock serializes refreshes of one object, so the last one
+            # to commit has seen every review committed before it.
+            if not list(cls.model.objects.select_for_update().filter(id=object_id).values_list("id", flat=True)):
+                return
+            totals = cls.get_counted_reviews().filter(object_id=object_id).aggregate(**cls.get_aggregates())
+            cls.model.objects.filter(id=object_id).update(rating=cls.get_rating(totals), **totals)
+            mark_dirty([object_id])
+
+    @classmethod
+    def refresh_for_review(cls, review_id):
+        object_id = cls.review_model.objects.filter(id=review_id).values_list("object_id", flat=True).first()
+        if object_id is not None:
+            cls.refresh(object_id)
+
+    @classmethod
+    def rebuild(cls, chunk_size=500):
+        empty = {field: 0 for field in cls.fields if field != "rating"}
+        totals_by_object = {
+            row.pop("object_id"): row
+            for row in cls.get_counted_reviews().values("object_id").annotate(**cls.get_aggregates()).order_by()
+        }
+        objects = list(cls.model.objects.only("id", *cls.fields))
+        for location_object in objects:
+            totals = totals_by_object.get(location_object.id, empty)
+            for field, value in totals.items():
+                setattr(location_object, field, value)
+            location_object.rating = cls.get_rating(totals)
+        cls.model.objects.bulk_update(objects, cls.fields, batch_size=chunk_size)
+        return len(objects)
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.reviews.models import ObjectReview, ReviewCheck
+from apps.reviews.services import ObjectRatingService
+
+
+@receiver([post_save, post_delete], sender=ObjectReview)
+def refresh_rating_for_review(sender, instance, **kwargs):
+    ObjectRatingService.refresh(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=ReviewCheck)
+def refresh_rating_for_check(sender, instance, **kwargs):
+    ObjectRatingService.refresh_for_review(instance.review_id)
@@ -188,6 +188,18 @@ class Orders(BaseModel):
         default=False
     )
 
+    quoted_price = models.BigIntegerField(
+        verbose_name=_('Стоимость проживания'),
+        null=True,
+        blank=True
+    )
+    expires_at = models.DateTimeField(
+        verbose_name=_('Истекает'),
+        null=True,
+        blank=True,
+        db_index=True
+    )
+
     def __str__(self):
         return f'order for {self.match_object.name}'
 
@@ -222,6 +234,16 @@ class TravelOffer(BaseModel):
         verbose_name=_('Отправлено'),
         default=False
     )
+    expires_at = models.DateTimeField(
+        verbose_name=_('Истекает'),
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    is_counted = models.BooleanField(
+        verbose_name=_('Учтено в аналитике'),
+        default=False
+    )
 
     first_name = models.CharField(max_length=200, verbose_name=_('Имя для брони'),  null=True, blank=True)
     last_name = models.CharField(max_length=200, verbose_name=_('Фамилия для брони'), null=True, blank=True)
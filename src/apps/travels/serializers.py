@@ -271,6 +271,7 @@ class OrderDetailWithEmailSerializer(serializers.ModelSerializer):
             'approved',
             'expired_in',
             'matched_price',
+            'quoted_price',
             'user_travel_count'
         ]
         read_only_fields = [
@@ -316,6 +317,7 @@ class OrderDetailSerializer(serializers.ModelSerializer):
             'approved',
             'expired_in',
             'matched_price',
+            'quoted_price',
             'user_travel_count'
         ]
         read_only_fields = [
@@ -1,21 +1,33 @@
+from collections import defaultdict
 from datetime import timedelta
 
+from django.conf import settings
 from django.db import models as db_models
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
 from apps.common.exceptions import UnifiedErrorResponse
 from apps.common.services import Service
-from apps.profiles.tasks.broker import send_order, send_offer, deleted_expired_orders, \
-    deleted_expired_offers
+from apps.profiles.tasks.broker import send_matched_orders, send_offer
 from apps.travels import models
 from apps.profiles.models.user import Currency, User
 from apps.profiles.serializers.user import CurrencySerializer
 from apps.houserent import models as houserent_models, serializers as houserent_serializers
+from apps.houserent.ranking import mark_dirty
+from apps.houserent.services import PlacementService, PriceCalendarService, StayQuoteService
 from rest_framework import response, status
 
 from apps.travels.models import Orders, TravelOffer
 
 
+class ExpiryService(Service):
+    ttl = timedelta(minutes=5)
+
+    @classmethod
+    def get_deadline(cls):
+        return timezone.now() + cls.ttl
+
+
 class TravelDetailCreateService(Service):
     model = models.TravelDetail
     date_model = models.TravelDate
@@ -79,37 +91,36 @@ class TravelDetailCreateService(Service):
 
     @classmethod
     def create_matching_orders(cls, travel_detail, *args, **kwargs):
-        start_date = travel_detail.date.start_date
-        end_date = travel_detail.date.end_date
-
-        matching_objects = cls.object_model.objects.filter(
-            location__placement=travel_detail.placement,
-            object_kind=travel_detail.object_kind
-        )
-        print(matching_objects)
+        filters = {'object_kind': travel_detail.object_kind}
         if travel_detail.object_type:
-            matching_objects = matching_objects.filter(object_type=travel_detail.object_type)
-
-        available_objects = matching_objects.filter(
-            db_models.Q(object_prices__start_date__lte=start_date) |
-            db_models.Q(object_prices__end_date__gte=end_date)
-        ).distinct()
+            filters['object_type'] = travel_detail.object_type
+
+        quotes = StayQuoteService.get_queryset(
+            travel_detail.date.start_date,
+            travel_detail.date.end_date,
+            PlacementService.subtree_q(travel_detail.placement),
+            fields=('object_id', 'object__vendor__email'),
+            **filters,
+        ).order_by('-object__score', 'object_id')[:settings.MATCHING_LIMIT]
+
+        expires_at = ExpiryService.get_deadline()
+        orders_by_vendor = defaultdict(list)
+        orders_to_create = []
+        for quote in quotes:
+            order = cls.order_model(
+                match_object_id=quote['object_id'],
+                travel_detail=travel_detail,
+                quoted_price=quote['total_price'],
+                expires_at=expires_at,
+            )
+            orders_to_create.append(order)
+            orders_by_vendor[quote['object__vendor__email']].append(str(order.id))
 
-        print(available_objects)
+        cls.order_model.objects.bulk_create(orders_to_create)
+        mark_dirty(order.match_object_id for order in orders_to_create)
 
-        for object in available_objects:
-            order = cls.order_model.objects.create(
-                match_object=object,
-                travel_detail=travel_detail
-            )
-            send_order.delay(order.id, order.match_object.vendor.email)
-            deleted_expired_orders.apply_async(
-                args=[
-                    order.id,
-                    order.match_object.vendor.email,
-                    'deleted_order_connections',
-                    'send_deleted_order_id',
-                ], countdown=300)
+        if orders_by_vendor:
+            send_matched_orders.delay(dict(orders_by_vendor))
 
     @classmethod
     def create_travel_date(cls, validated_data, *args, **kwargs):
@@ -254,14 +265,6 @@ class OrderDetailService(Service):
 
     @classmethod
     def get_queryset(cls, *args, **kwargs):
-        prices = cls.price_model.objects.filter(
-            db_models.Q(start_date__lte=db_models.OuterRef('travel_detail__date__end_date')) |
-            db_models.Q(end_date__gte=db_models.OuterRef('travel_detail__date__end_date')),
-            object_id=db_models.OuterRef('match_object__id'),
-        ).order_by('start_date')
-
-        price_subquery = db_models.Subquery(prices.values('price')[:1])
-
         queryset = (
             cls.model.objects.filter(*args, **kwargs)
             .select_related(
@@ -285,13 +288,17 @@ class OrderDetailService(Service):
             .annotate(
                 expired_in=db_models.ExpressionWrapper(db_models.F('travel_detail__created_at') + timedelta(minutes=15),
                                                        output_field=db_models.DateTimeField()),
-                matched_price=price_subquery,
                 user_travel_count=db_models.Subquery(
                     cls.get_travel_count(),
                     output_field=db_models.IntegerField())
             )
         )
-        return queryset
+        return PriceCalendarService.annotate_price(
+            queryset,
+            date=db_models.F('travel_detail__date__end_date'),
+            object_path='match_object',
+            name='matched_price',
+        )
 
 
 class TravelOfferService(Service):
@@ -387,17 +394,10 @@ class TravelOfferService(Service):
             price=price,
             order_number=order_code,
             order_id=order,
+            expires_at=ExpiryService.get_deadline(),
         )
         send_offer.delay(offer.id, offer.order.travel_detail.user.email)
 
-        deleted_expired_offers.apply_async(
-            args=[
-                offer.id,
-                offer.order.match_object.vendor.email,
-                'deleted_offers_connections',
-                'send_deleted_offers_id',
-            ], countdown=300)
-
         OrderDetailService.make_approved_true(order)
 
         expires_in = offer.created_at + timedelta(minutes=15)
@@ -6,4 +6,7 @@ class VendorsConfig(AppConfig):
     name = 'apps.vendors'
 
     verbose_name = "Панель Вендора"
-    verbose_name_plural = "Панель Вендора"
\ No newline at end of file
+    verbose_name_plural = "Панель Вендора"
+
+    def ready(self):
+        import apps.vendors.signals
@@ -1,108 +1,121 @@
-import jwt
-from asgiref.sync import sync_to_async
-from channels.generic.websocket import AsyncWebsocketConsumer
+import asyncio
+import json
+from urllib.parse import parse_qs
 
-from apps.profiles.models.user import Vendor
-from apps.profiles.tasks.broker import send_orders
-from apps.vendors.utils import add_to_redis, delete_from_redis
-from core.settings.base import SECRET_KEY
+from apps.common import outbox
+from apps.common.consumers import RegisteredConsumer
+from apps.profiles.models.user import User, Vendor
+from apps.profiles.tasks.broker import (
+    send_orders, send_offers, send_deleted_offers, send_some_payment_status
+)
 
 
-class VendorConsumer(AsyncWebsocketConsumer):
-    vendor_connections = {}
+class VendorConsumer(RegisteredConsumer):
+    user_model = Vendor
+    connections_key = 'vendor_connections'
+    connect_task = send_orders
 
-    @sync_to_async
-    def get_user(self, user_id):
-        return Vendor.objects.get(id=user_id)
+    async def send_orders(self, event):
+        await self.send_frames(event)
 
-    async def connect(self):
-        await self.accept()
-        token = self.scope['query_string'].decode()
-        tk = token.split('=')[1]
-        try:
-            decoded_token = jwt.decode(tk, SECRET_KEY, algorithms=['HS256'])
-            user_id = decoded_token.get("user_id")
-            if not user_id:
-                await self.close(code=4001)
-                return
-            user = await self.get_user(decoded_token.get("user_id"))
-            if not user:
-                await self.close(code=4001)
-                return
-            self.vendor_connections[str(user)] = self.channel_name
-            add_to_redis('vendor_connections', str(user), self.channel_name)
-            send_orders.delay(str(user))
-        except jwt.ExpiredSignatureError:
-            await self.send(text_data='{"error": "Invalid token"}')
-            await self.close(code=4001)
-        except jwt.DecodeError:
-            await self.send(text_data='{"error": "Invalid token"}')
-            await self.close(code=4001)
-        except Exception as e:
-            await self.send(text_data=f'{{"error": "{str(e)}"}}')
-            await self.close(code=4001)
-
-    async def disconnect(self, event):
-        token_to_remove = []
-        for user_email, channel_name in self.vendor_connections.items():
-            if channel_name == self.channel_name:
-                delete_from_redis('vendor_connections', user_email)
-                token_to_remove.append(user_email)
-        del self.vendor_connections[token_to_remove[0]]
 
-    async def send_orders(self, event):
-        message = event["message"]
+class VendorDeleteOrderConsumer(RegisteredConsumer):
+    user_model = Vendor
+    connections_key = 'deleted_order_connections'
+    connect_task = send_orders
+
+    async def send_deleted_order_id(self, event):
+        await self.send_frames(event)
+
+
+class StreamConsumer(RegisteredConsumer):
+    """A single socket carrying every stream the account is subscribed to.
+
+    Connect with ``?token=<jwt>`` and optionally ``&streams=orders,offers``.
+    Every frame is ``{"stream": <name>, "payload": <message>}``; frames kept in
+    the outbox also carry a ``cursor``. A client resumes with
+    ``&cursor=<last seen cursor>`` and gets only the frames written since
+    then. Clients that connect with a stable ``&device=<id>`` can instead
+    acknowledge with ``{"ack": <cursor>}`` and resume from that device's last
+    acknowledgement; acks are never shared between devices.
+    """
+    # stream name -> (connections key, task run on connect)
+    vendor_streams = {
+        'orders': ('vendor_connections', send_orders),
+        'deleted_orders': ('deleted_order_connections', None),
+    }
+    user_streams = {
+        'offers': ('user_connections', send_offers),
+        'deleted_offers': ('deleted_offers_connections', send_deleted_offers),
+        'payment_status': ('payment_connections', send_some_payment_status),
+    }
 
-        await self.send(
-            text_data=message
-        )
+    def get_query_params(self):
+        return parse_qs(self.scope['query_string'].decode())
 
+    def get_query_value(self):
+        return self.get_query_params().get('token', [''])[0]
 
-class VendorDeleteOrderConsumer(AsyncWebsocketConsumer):
-    delete_order_connections = {}
+    async def get_user(self, user_id):
+        for model in (Vendor, User):
+            user = await model.objects.filter(id=user_id).afirst()
+            if user:
+                return user
+        return None
 
-    @sync_to_async
-    def get_user(self, user_id):
-        return Vendor.objects.get(id=user_id)
+    def get_streams(self, user):
+        streams = self.vendor_streams if isinstance(user, Vendor) else self.user_streams
+        requested = self.get_query_params().get('streams')
+        if requested:
+            names = set(requested[0].split(','))
+            streams = {name: stream for name, stream in streams.items() if name in names}
+        return streams
 
-    async def connect(self):
-        await self.accept()
-        token = self.scope['query_string'].decode()
-        tk = token.split('=')[1]
+    def get_device(self):
+        return self.get_query_params().get('device', [None])[0]
+
+    async def register(self, user):
+        self.user_email = str(user.email)
+        streams = self.get_streams(user)
+        self.connections_keys = tuple(key for key, _ in streams.values())
+        await self.join()
+
+        cursor = self.get_query_params().get('cursor', [None])[0]
+        if not cursor and self.get_device():
+            cursor = await outbox.aget_ack(self.user_email, self.get_device())
+        if cursor:
+            await self.replay(streams, cursor)
+            return
+        await asyncio.gather(*(
+            self.run_task(task) for _, task in streams.values() if task is not None
+        ))
+
+    async def replay(self, streams, cursor):
+        stream_names = {key: name for name, (key, _) in streams.items()}
+        for entry_cursor, connections_key, message in await outbox.aread(
+            self.user_email, cursor, self.connections_keys
+        ):
+            await self.send(text_data=self.format_frame(message, stream_names[connections_key], entry_cursor))
+
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            decoded_token = jwt.decode(tk, SECRET_KEY, algorithms=['HS256'])
-            user_id = decoded_token.get("user_id")
-            if not user_id:
-                await self.close(code=4001)
-                return
-            user = await self.get_user(decoded_token.get("user_id"))
-            if not user:
-                await self.close(code=4001)
-                return
-            self.delete_order_connections[str(user)] = self.channel_name
-            add_to_redis('deleted_order_connections', str(user), self.channel_name)
-            send_orders.delay(str(user))
-        except jwt.ExpiredSignatureError:
-            await self.send(text_data='{"error": "Invalid token"}')
-            await self.close(code=4001)
-        except jwt.DecodeError:
-            await self.send(text_data='{"error": "Invalid token"}')
-            await self.close(code=4001)
-        except Exception as e:
-            await self.send(text_data=f'{{"error": "{str(e)}"}}')
-            await self.close(code=4001)
-
-    async def disconnect(self, event):
-        token_to_remove = []
-        for user_email, channel_name in self.delete_order_connections.items():
-            if channel_name == self.channel_name:
-                delete_from_redis('deleted_order_connections', user_email)
-                token_to_remove.append(user_email)
-        del self.delete_order_connections[token_to_remove[0]]
+            cursor = json.loads(text_data).get('ack')
+        except (TypeError, ValueError, AttributeError):
+            return
+        if cursor and self.user_email and self.get_device():
+            await outbox.aack(self.user_email, self.get_device(), str(cursor))
+
+    async def send_orders(self, event):
+        await self.send_frames(event, stream='orders')
 
     async def send_deleted_order_id(self, event):
-        message = event["message"]
+        await self.send_frames(event, stream='deleted_orders')
+
+    async def send_offers(self, event):
+        await self.send_frames(event, stream='offers')
+
+    async def send_deleted_offers_id(self, event):
+        await self.send_frames(event, stream='deleted_offers')
 
-        await self.send(
-            text_data=message
-        )
+    async def send_payment_status(self, event):
+        await self.send_frames(event, stream='payment_status')
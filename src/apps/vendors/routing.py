@@ -8,4 +8,5 @@ websocket_urlpatterns = [
     path('offers/', user.UserConsumer.as_asgi()),
     path('deleted_offers/', user.DeletedOffersConsumer.as_asgi()),
     path('payment_status/', user.PaymentResultConsumer.as_asgi()),
+    path('stream/', consumers.StreamConsumer.as_asgi()),
 ]
\ No newline at end of file
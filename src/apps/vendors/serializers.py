@@ -4,7 +4,7 @@ from django.core.exceptions import ValidationError
 from apps.profiles.models.user import Vendor, CustomUser
 from apps.travels.models import Orders, TravelDetail, TravelBudget, TravelDate, TravelOffer, GuestQuantity, \
     FacilitiesQuantity
-from core.settings import base
+from apps.common.media import image_url
 from . import services
 from .services import TwoFactorService
 from ..houserent.models import LocationObject, ObjectImage, ObjectKind, ObjectPrice, ObjectType, Placement
@@ -80,7 +80,7 @@ class ImageObjectSerializer(serializers.ModelSerializer):
         fields = ['image']
 
     def get_image(self, image):
-        return f"{base.BASE_URL}{image.image.url}"
+        return image_url(image.image, 'small')
 
 
 class ObjectOrderKindSerializer(serializers.ModelSerializer):
@@ -134,7 +134,8 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Orders
-        fields = ['id', 'travel_detail', 'match_object', 'created_at', 'matched_price', 'suggested_price']
+        fields = ['id', 'travel_detail', 'match_object', 'created_at', 'matched_price', 'quoted_price',
+                  'suggested_price']
 
 
 class CurrentOccupancyLocationObjectSerializer(serializers.ModelSerializer):
@@ -1,11 +1,13 @@
+import json
+import uuid
 from datetime import timedelta
 import pyotp
 from argon2 import exceptions
 
-from django.db.models import OuterRef, Subquery, IntegerField
+from django.db.models import F, OuterRef, Subquery, IntegerField
 from django.db.models import Count, Q
-from django.db import models
 
+from django.core.cache import cache
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.contrib.auth.hashers import make_password
@@ -14,8 +16,10 @@ from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from django.core.exceptions import ObjectDoesNotExist
 
 from apps.common.exceptions import UnifiedErrorResponse
+from apps.common.prefetch import optimize_queryset
 from apps.common.services import Service
 from apps.houserent.models import ObjectPrice
+from apps.houserent.services import PriceCalendarService
 from apps.profiles.models.user import Vendor, UserResetCode
 from apps.profiles.utils.sendCode import send_verification_mail
 from apps.travels.models import Orders, TravelOffer
@@ -95,22 +99,17 @@ class OrderListService(Service):
 
     @classmethod
     def get_vendor_orders(cls, vendor):
-        prices = ObjectPrice.objects.filter(
-            object_id=OuterRef('match_object__id'),
-            start_date__lte=OuterRef('travel_detail__date__end_date'),
-            end_date__gte=OuterRef('travel_detail__date__end_date')
-        ).order_by('start_date')
-
-        price_subquery = Subquery(prices.values('price')[:1])
-
         orders = cls.model.objects.filter(
             is_deleted=False,
             match_object__vendor=vendor,
             approved=None,
-        ).annotate(
-            matched_price=price_subquery
         )
-        return orders
+        return PriceCalendarService.annotate_price(
+            orders,
+            date=F('travel_detail__date__end_date'),
+            object_path='match_object',
+            name='matched_price',
+        )
 
     @classmethod
     def approved_vendor_orders(cls, vendor):
@@ -142,15 +141,6 @@ class OrderListService(Service):
 
     @classmethod
     def detail_current_occupancy(cls, order_id, vendor):
-
-        prices = cls.price_model.objects.filter(
-            models.Q(start_date__lte=models.OuterRef('travel_detail__date__end_date')) |
-            models.Q(end_date__gte=models.OuterRef('travel_detail__date__end_date')),
-            object_id=models.OuterRef('match_object__id'),
-        ).order_by('start_date')
-
-        price_subquery = models.Subquery(prices.values('price')[:1])
-
         paid_offers_subquery = cls.offer_model.objects.filter(
             is_deleted=False,
             is_payed=True,
@@ -158,17 +148,116 @@ class OrderListService(Service):
         ).values('order__travel_detail__user').annotate(total_count=Count('id')).values('total_count')
         paid_offers_count = Subquery(paid_offers_subquery[:1], output_field=IntegerField())
 
-        order = cls.model.objects.filter(
+        orders = cls.model.objects.filter(
             id=order_id,
             offers__is_payed=True,
             is_deleted=False,
             match_object__vendor=vendor
         ).annotate(
             travel_quantity=paid_offers_count,
-            matched_price=price_subquery
+        )
+        return PriceCalendarService.annotate_price(
+            orders,
+            date=F('travel_detail__date__end_date'),
+            object_path='match_object',
+            name='matched_price',
         ).first()
-        print(order)
-        return order
+
+
+class OrderPayloadService(Service):
+    """Caches the serialized JSON of orders pushed to vendors.
+
+    A payload key is built from the order id, its ``updated_at`` and two
+    version tokens, one for the order and one for its object. Bumping a token
+    makes every payload that used it unreachable, so invalidation never has
+    to find the keys it retires.
+    """
+    model = Orders
+    timeout = 60 * 60
+
+    @staticmethod
+    def get_order_version_key(order_id):
+        return f'order_payload:order:{order_id}'
+
+    @staticmethod
+    def get_object_version_key(object_id):
+        return f'order_payload:object:{object_id}'
+
+    @classmethod
+    def bump_order(cls, order_id):
+        cache.set(cls.get_order_version_key(order_id), uuid.uuid4().hex, None)
+
+    @classmethod
+    def bump_object(cls, object_id):
+        cache.set(cls.get_object_version_key(object_id), uuid.uuid4().hex, None)
+
+    @classmethod
+    def get_payloads_by_id(cls, order_ids):
+        """JSON strings of the given orders keyed by order id."""
+        from apps.vendors.serializers import OrderSerializer
+
+        order_ids = [uuid.UUID(str(order_id)) for order_id in order_ids]
+        rows = {
+            order_id: (updated_at, object_id)
+            for order_id, updated_at, object_id in cls.model.objects.filter(id__in=order_ids).values_list(
+                'id', 'updated_at', 'match_object_id'
+            )
+        }
+        version_keys = [cls.get_order_version_key(order_id) for order_id in rows]
+        version_keys += [cls.get_object_version_key(object_id) for _, object_id in rows.values()]
+        versions = cache.get_many(version_keys)
+
+        payload_keys = {
+            order_id: 'order_payload:{}:{}:{}:{}'.format(
+                order_id,
+                updated_at.timestamp(),
+                versions.get(cls.get_order_version_key(order_id), 0),
+                versions.get(cls.get_object_version_key(object_id), 0),
+            )
+            for order_id, (updated_at, object_id) in rows.items()
+        }
+        cached = cache.get_many(payload_keys.values())
+        payloads = {
+            order_id: cached[key] for order_id, key in payload_keys.items() if key in cached
+        }
+
+        missing = [order_id for order_id in rows if order_id not in payloads]
+        if missing:
+            orders = PriceCalendarService.annotate_price(
+                optimize_queryset(cls.model.objects.filter(id__in=missing), OrderSerializer),
+                date=F('travel_detail__date__end_date'),
+                object_path='match_object',
+                name='matched_price',
+            )
+            fresh = {
+                order.id: json.dumps(OrderSerializer(order).data, ensure_ascii=False)
+                for order in orders
+            }
+            cache.set_many({payload_keys[order_id]: payload for order_id, payload in fresh.items()}, cls.timeout)
+            payloads.update(fresh)
+
+        return payloads
+
+    @classmethod
+    def get_payloads(cls, order_ids):
+        """JSON strings of the given orders, in the order of ``order_ids``."""
+        payloads = cls.get_payloads_by_id(order_ids)
+        return [
+            payloads[order_id]
+            for order_id in (uuid.UUID(str(order_id)) for order_id in order_ids)
+            if order_id in payloads
+        ]
+
+    @classmethod
+    def get_list_payload(cls, order_ids, payloads=None):
+        """A JSON list of the orders, reusing ``payloads`` from ``get_payloads_by_id`` if given."""
+        if payloads is None:
+            payloads = cls.get_payloads_by_id(order_ids)
+        return '[' + ','.join(
+            payloads[order_id]
+            for order_id in (uuid.UUID(str(order_id)) for order_id in order_ids)
+            if order_id in payloads
+        ) + ']'
 
 
 class AgreementService(Service):
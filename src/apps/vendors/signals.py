@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.signals import image_compressed
+from apps.houserent.models import LocationObject, ObjectImage, ObjectPrice
+from apps.travels.models import Orders, TravelOffer
+from apps.vendors.services import OrderPayloadService
+
+
+@receiver([post_save, post_delete], sender=Orders)
+def invalidate_payload_for_order(sender, instance, **kwargs):
+    OrderPayloadService.bump_order(instance.id)
+
+
+@receiver([post_save, post_delete], sender=TravelOffer)
+def invalidate_payload_for_offer(sender, instance, **kwargs):
+    OrderPayloadService.bump_order(instance.order_id)
+
+
+@receiver(post_save, sender=LocationObject)
+def invalidate_payload_for_object(sender, instance, **kwargs):
+    OrderPayloadService.bump_object(instance.id)
+
+
+@receiver([post_save, post_delete, image_compressed], sender=ObjectImage)
+@receiver([post_save, post_delete], sender=ObjectPrice)
+def invalidate_payload_for_object_part(sender, instance, **kwargs):
+    OrderPayloadService.bump_object(instance.object_id)
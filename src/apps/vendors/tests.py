@@ -1,3 +1,116 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.common.testing import (
+    LOCMEM_CACHES,
+    create_object,
+    create_offer,
+    create_order,
+    create_vendor,
+)
+from apps.common.tasks import compress_image_field
+from apps.houserent.models import ObjectImage
+from apps.profiles.models.user import CustomUser
+from apps.vendors.services import OrderPayloadService
+from PIL import Image
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VendorOrderListQueryCountTests(TestCase):
+    """The vendor order lists run the same number of queries however many rows they return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendor = create_vendor()
+        cls.location_object = create_object(cls.vendor, images=2)
+
+    def setUp(self):
+        self.client = APIClient()
+        # IsVendor checks the `vendor` accessor of the base user row.
+        self.client.force_authenticate(CustomUser.objects.get(pk=self.vendor.pk))
+
+    def add_orders(self, count, **kwargs):
+        for _ in range(count):
+            create_offer(create_order(self.location_object, **kwargs))
+
+    def add_paid_orders(self, count):
+        for _ in range(count):
+            create_offer(create_order(self.location_object), is_payed=True)
+
+    def get_query_count(self, url):
+        # IsVendor's hasattr(request.user, 'vendor') loads the Vendor row on
+        # the first request and caches it on the force-authenticated user,
+        # which every later request reuses. Warm it up so the baseline counts
+        # the same queries as the requests it is compared with.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url, add_rows):
+        add_rows(1)
+        expected = self.get_query_count(url)
+        add_rows(4)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 5)
+
+    def test_order_list(self):
+        self.assert_constant_queries('/api/v1/vendors/orders/', self.add_orders)
+
+    def test_approved_order_list(self):
+        self.assert_constant_queries(
+            '/api/v1/vendors/approved_orders/',
+            lambda count: self.add_orders(count, approved=True),
+        )
+
+    def test_current_occupancy(self):
+        self.assert_constant_queries('/api/v1/vendors/current_occupancies/', self.add_paid_orders)
+
+    def test_other_vendors_objects_do_not_add_queries(self):
+        self.add_orders(1)
+        expected = self.get_query_count('/api/v1/vendors/orders/')
+        other_object = create_object(create_vendor(), images=3)
+        create_order(other_object)
+        with self.assertNumQueries(expected):
+            self.client.get('/api/v1/vendors/orders/')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, IMAGE_PLACEHOLDER_URL='')
+class CompressedImagePayloadTests(TestCase):
+    """Cached order payloads pick up an image once it is compressed."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_payload_url_changes_after_compression(self):
+        location_object = create_object(create_vendor(), images=0)
+        content = BytesIO()
+        Image.new('RGB', (40, 30)).save(content, format='PNG')
+        image = ObjectImage.objects.create(
+            object=location_object,
+            image=SimpleUploadedFile('photo.png', content.getvalue(), content_type='image/png'),
+        )
+        self.assertTrue(image.image.is_pending)
+        order = create_order(location_object)
+        pending_payload, = OrderPayloadService.get_payloads([order.id])
+        self.assertIn(image.image.name, pending_payload)
+
+        compress_image_field('houserent.ObjectImage', str(image.pk), 'image')
+
+        compressed_name = ObjectImage.objects.get(pk=image.pk).image.name
+        payload, = OrderPayloadService.get_payloads([order.id])
+        self.assertNotIn(image.image.name, payload)
+        self.assertIn(compressed_name, payload)
@@ -1,6 +1,7 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from apps.common.exceptions import UnifiedErrorResponse
+from apps.common.mixins import PrefetchedQuerysetMixin
 from apps.houserent.permissions import IsVendor, IsVendorOwnerOrReadOnly
 from apps.profiles.services import user
 from apps.profiles.services import user as user_service
@@ -17,7 +18,6 @@ from apps.vendors import swagger
 from apps.profiles.swaggers import swagger as vendor_confirm
 from apps.profiles.models import user as models
 from apps.vendors.serializers import OrderSerializer, CurrentOccupancySerializer, DetailCurrentOccupancySerializer
-from apps.vendors.utils import send_sms_code_from_nikita
 
 
 class RegisterVendorAPIView(generics.CreateAPIView):
@@ -232,7 +232,7 @@ class TwoFactorVerifyAPIView(generics.GenericAPIView):
             return Response(data={'wrong code'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class OrderListAPIView(generics.ListAPIView):
+class OrderListAPIView(PrefetchedQuerysetMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsVendor]
 
@@ -240,7 +240,7 @@ class OrderListAPIView(generics.ListAPIView):
         return v_services.OrderListService.get_vendor_orders(self.request.user.vendor)
 
 
-class ApprovedOrderListAPIView(generics.ListAPIView):
+class ApprovedOrderListAPIView(PrefetchedQuerysetMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsVendor]
 
@@ -248,7 +248,7 @@ class ApprovedOrderListAPIView(generics.ListAPIView):
         return v_services.OrderListService.approved_vendor_orders(self.request.user.vendor)
 
 
-class CurrentOccupancyAPIView(generics.ListAPIView):
+class CurrentOccupancyAPIView(PrefetchedQuerysetMixin, generics.ListAPIView):
     serializer_class = CurrentOccupancySerializer
     permission_classes = [IsVendor]
 
@@ -1,11 +1,27 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.base')
 
-app = Celery('core', include=['apps.profiles.tasks.sendCode', 'apps.profiles.tasks.broker'],
+app = Celery('core', include=['apps.profiles.tasks.sendCode', 'apps.profiles.tasks.broker', 'apps.common.tasks',
+                              'apps.houserent.tasks'],
              broker='redis://redis:6379/0')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def init_redis_pool(**kwargs):
+    from apps.common.redis_pool import get_pool, reset_pool, start_pool_stats_reporter
+    reset_pool()
+    get_pool()
+    start_pool_stats_reporter()
+
+
+@worker_process_shutdown.connect
+def report_redis_pool(**kwargs):
+    from apps.common.redis_pool import log_pool_stats
+    log_pool_stats()
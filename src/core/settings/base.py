@@ -121,6 +121,15 @@ DATE_FORMAT = "%Y-%m-%d"
 SMALL_THUMBNAIL_SIZE = 512, 512
 MEDIUM_THUMBNAIL_SIZE = 1024, 1024
 LARGE_THUMBNAIL_SIZE = 2048, 2048
+IMAGE_PLACEHOLDER_URL = env('IMAGE_PLACEHOLDER_URL', default='')
+IMAGE_VARIANTS = {
+    'thumb': (256, 256),
+    'small': SMALL_THUMBNAIL_SIZE,
+    'medium': MEDIUM_THUMBNAIL_SIZE,
+    'large': LARGE_THUMBNAIL_SIZE,
+}
+IMAGE_VARIANT_QUALITY = 60
+IMAGE_MAX_PIXELS = env('IMAGE_MAX_PIXELS', default=50_000_000, cast=int)
 
 USE_I18N = True
 
@@ -190,16 +199,23 @@ CELERY_BROKER_URL = env('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = env('CELERY_BROKER_URL')
 CELERY_BEAT_SCHEDULER = env('CELERY_BEAT_SCHEDULER')
 
-# CELERY_BEAT_SCHEDULE = {
-#     'delete_expired_order': {
-#         'task': 'apps.profiles.tasks.broker.clean_up_expired_orders',
-#         'schedule': 180,
-#     },
-#     'delete_expired_offer': {
-#         'task': 'apps.profiles.tasks.broker.clean_up_expired_orders',
-#         'schedule': 180,
-#     },
-# }
+CELERY_BEAT_SCHEDULE = {
+    'sweep_expired': {
+        'task': 'apps.profiles.tasks.broker.sweep_expired',
+        'schedule': env('EXPIRY_SWEEP_INTERVAL', default=30, cast=int),
+    },
+    'refresh_object_scores': {
+        'task': 'apps.houserent.tasks.refresh_object_scores',
+        'schedule': env('RANKING_REFRESH_INTERVAL', default=60, cast=int),
+    },
+    'rebuild_object_scores': {
+        'task': 'apps.houserent.tasks.rebuild_object_scores',
+        'schedule': env('RANKING_REBUILD_INTERVAL', default=86400, cast=int),
+    },
+}
+
+# Matching offers a travel request to at most this many objects, best scored first.
+MATCHING_LIMIT = env('MATCHING_LIMIT', default=50, cast=int)
 
 CSRF_TRUSTED_ORIGINS = [origin.strip() for origin in env('CSRF_TRUSTED_ORIGINS').split(',')]
 CORS_ALLOW_ALL_ORIGINS = env('CORS_ALLOW_ALL_ORIGINS', cast=bool)
@@ -8,6 +8,9 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework.documentation import include_docs_urls
 
+from apps.common.fields import VARIANTS_DIR
+from apps.common.views import ImageVariantView
+
 schema_view = get_schema_view(
    openapi.Info(
       title="Snippets API",
@@ -37,6 +40,12 @@ urlpatterns = [
 
     path('docs/', include_docs_urls(title='IZDE API')),
 
+    path(
+        f"{settings.MEDIA_URL.strip('/')}/{VARIANTS_DIR}/<str:variant>/<path:name>",
+        ImageVariantView.as_view(),
+        name='image-variant',
+    ),
+
 
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),